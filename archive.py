@@ -0,0 +1,216 @@
+import logging
+import sys
+from datetime import date, datetime, timedelta
+from psycopg2 import sql
+from database import Database
+from export import pyarrow_module, news_schema, stream_news
+from migrations import month_start
+from config import RETENTION_DAYS, ARCHIVE_PATH, ARCHIVE_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+# pyarrow's hive partitioning reads this directory value back as null
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+
+class _PartitionWriters:
+    """
+    One Parquet file per (month, type) directory. Each streamed batch is
+    split by month and type with pyarrow compute kernels; the type column is
+    dropped since the directory already encodes it. Files are written under
+    a dot-prefixed name, which dataset readers skip, and renamed into place
+    on close().
+    """
+
+    def __init__(self, filesystem, root, file_name):
+        self.pa = pyarrow_module()
+        self.filesystem = filesystem
+        self.root = root.rstrip('/')
+        self.file_name = file_name
+        self.writers = {}
+        self.rows = 0
+
+    def _directory(self, key):
+        month, news_type = key
+        return f"{self.root}/month={month}/type={news_type or NULL_PARTITION}"
+
+    def write(self, batch):
+        pa, pc = self.pa, self.pa.compute
+        months = pc.strftime(pc.cast(batch.column('date'), pa.timestamp('s')), format='%Y-%m')
+        types = batch.column('type')
+        columns = [name for name in batch.schema.names if name != 'type']
+        for month in pc.unique(months).to_pylist():
+            in_month = pc.equal(months, month)
+            for news_type in pc.unique(pc.filter(types, in_month)).to_pylist():
+                is_type = pc.is_null(types) if news_type is None else pc.equal(types, news_type)
+                self._writer((month, news_type), columns).write_batch(
+                    batch.filter(pc.and_(in_month, is_type)).select(columns)
+                )
+        self.rows += batch.num_rows
+
+    def _writer(self, key, columns):
+        writer = self.writers.get(key)
+        if writer is None:
+            directory = self._directory(key)
+            self.filesystem.create_dir(directory, recursive=True)
+            schema = news_schema()
+            writer = self.pa.parquet.ParquetWriter(
+                f"{directory}/.{self.file_name}.tmp",
+                self.pa.schema([schema.field(name) for name in columns]),
+                filesystem=self.filesystem, compression='zstd'
+            )
+            self.writers[key] = writer
+        return writer
+
+    def close(self):
+        for key, writer in self.writers.items():
+            writer.close()
+            directory = self._directory(key)
+            self.filesystem.move(f"{directory}/.{self.file_name}.tmp", f"{directory}/{self.file_name}")
+        return self.rows
+
+
+class NewsArchiver:
+    """
+    Retention job for news. Monthly partitions whose whole range is older
+    than `retention_days` are detached (so they stop receiving writes), then
+    streamed through a server-side cursor into zstd compressed Parquet
+    files laid out as month=YYYY-MM/type=<type>/<partition>.parquet, and
+    finally dropped together with their news_descriptions rows. Old rows
+    that ended up in news_default are exported and deleted in a single
+    REPEATABLE READ transaction. The heatmap rollup is left untouched.
+
+    A run that fails after detaching leaves the detached table in place; the
+    next run finds and archives it, overwriting any partial export.
+    """
+
+    def __init__(self, db, path=ARCHIVE_PATH, retention_days=RETENTION_DAYS,
+                 chunk_size=ARCHIVE_CHUNK_SIZE):
+        self.db = db
+        self.path = path
+        self.retention_days = retention_days
+        self.chunk_size = chunk_size
+
+    def cutoff(self, today=None):
+        """First day that is kept: the start of the month containing the retention limit"""
+        today = today or date.today()
+        return month_start(today - timedelta(days=self.retention_days))
+
+    def _filesystem(self):
+        pa = pyarrow_module()
+        filesystem, root = pa.fs.FileSystem.from_uri(self.path) if '://' in self.path \
+            else (pa.fs.LocalFileSystem(), self.path)
+        return filesystem, root
+
+    def _export(self, conn, table, file_name, where=None, params=()):
+        filesystem, root = self._filesystem()
+        writers = _PartitionWriters(filesystem, root, file_name)
+        for batch in stream_news(conn, self.chunk_size, table, where, params):
+            writers.write(batch)
+        return writers.close()
+
+    def _detached_partitions(self, cursor):
+        """Monthly news partitions that are no longer attached to news"""
+        cursor.execute("""
+        SELECT c.relname FROM pg_class c
+        WHERE c.relkind = 'r' AND c.relname LIKE 'news\\_p%'
+            AND NOT EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid)
+        """)
+        return sorted(name for (name,) in cursor.fetchall())
+
+    def archive_partition(self, name):
+        """Export a detached partition, then drop it and its descriptions"""
+        with self.db.connection() as conn:
+            rows = self._export(conn, name, f"{name}.parquet")
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    sql.SQL("DELETE FROM news_descriptions d USING {} n WHERE d.news_id = n.id")
+                    .format(sql.Identifier(name))
+                )
+                cursor.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(name)))
+            conn.commit()
+        logger.info(f"Archived {rows} rows from {name}")
+        return rows
+
+    def archive_default_partition(self, cutoff):
+        where = "n.date < %s"
+        with self.db.connection() as conn:
+            with conn.cursor() as cursor:
+                # The export and the deletes below must see the same rows
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            rows = self._export(
+                conn, 'news_default', f"news_default-{datetime.now():%Y%m%dT%H%M%S}.parquet",
+                where, (cutoff,)
+            )
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                DELETE FROM news_descriptions d USING news_default n
+                WHERE d.news_id = n.id AND n.date < %s
+                """, (cutoff,))
+                cursor.execute("DELETE FROM news_default WHERE date < %s", (cutoff,))
+            conn.commit()
+        if rows:
+            logger.info(f"Archived {rows} rows older than {cutoff} from news_default")
+        return rows
+
+    def run(self, today=None):
+        """Archive everything older than the cutoff; returns the number of rows archived"""
+        cutoff = self.cutoff(today)
+        try:
+            self.db.detach_partitions_before(cutoff)
+            with self.db.connection() as conn:
+                with conn.cursor() as cursor:
+                    pending = self._detached_partitions(cursor)
+                conn.commit()
+            archived = sum(self.archive_partition(name) for name in pending)
+            archived += self.archive_default_partition(cutoff)
+            logger.info(f"Archived {archived} rows older than {cutoff} to {self.path}")
+            return archived
+        except Exception as e:
+            logger.error(f"Error archiving news older than {cutoff}: {e}")
+            raise
+
+
+def read_archive(path=ARCHIVE_PATH, types=None, start_date=None, end_date=None, columns=None):
+    """
+    Load archived articles as a pyarrow Table, reading only the month and
+    type directories that can match. Use .to_pandas() or
+    pyarrow.dataset.dataset(path, partitioning='hive') for anything more.
+    """
+    pa = pyarrow_module()
+    ds = pa.dataset
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    condition = None
+
+    def both(expression):
+        return expression if condition is None else condition & expression
+
+    if types:
+        condition = both(ds.field('type').isin(list(types)))
+    if start_date is not None:
+        condition = both(ds.field('month') >= f"{start_date:%Y-%m}")
+        condition = both(ds.field('date') >= pa.scalar(start_date, pa.date32()))
+    if end_date is not None:
+        condition = both(ds.field('month') <= f"{end_date:%Y-%m}")
+        condition = both(ds.field('date') <= pa.scalar(end_date, pa.date32()))
+    return dataset.to_table(columns=columns, filter=condition)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    # python archive.py            archive rows past the retention period
+    # python archive.py read [start [end [types]]]   dump the archive as CSV
+    if sys.argv[1:2] == ['read']:
+        import pyarrow.csv
+        args = sys.argv[2:] + [None] * 3
+        table = read_archive(
+            start_date=date.fromisoformat(args[0]) if args[0] else None,
+            end_date=date.fromisoformat(args[1]) if args[1] else None,
+            types=args[2].split(',') if args[2] else None
+        )
+        pyarrow.csv.write_csv(table, sys.stdout.buffer)
+    else:
+        NewsArchiver(Database()).run()
@@ -2,6 +2,9 @@ import boto3
 import json
 import logging
 import asyncio
+import functools
+from database import call_db
+from article_writer import SPOOLED
 from config import AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_REGION, CLAUDE_MODEL_ID, VALID_CATEGORIES
 
 logger = logging.getLogger(__name__)
@@ -173,33 +176,64 @@ class ArticleProcessor:
 
         return await loop.run_in_executor(None, _call_bedrock_messages)
 
-    async def process_articles(self, article_queue, geocoder, db):
-        """Process articles from the queue"""
+    async def process_articles(self, article_queue, geocoder, db, writer=None):
+        """
+        Process articles from the queue. With an ArticleWriter the worker hands
+        the article off for batched storage and moves on; the queue item is
+        marked done once its batch has been written. Articles whose content
+        changed go through the whole pipeline again and replace the stored
+        row.
+        """
         while True:
             article = await article_queue.get()
+            handed_off = False
             try:
+                # Cosmetic edit of a stored article: its classification and
+                # location still apply, so only the text is refreshed
+                if article.get('change') == 'cosmetic':
+                    await call_db(db.update_article_text, article)
+                    continue
+
                 # Step 1: Classify the article
                 classified_article = await self.classify_article(article)
                 if not classified_article:
-                    article_queue.task_done()
                     continue
 
                 # Step 2: Extract location
                 article_with_location = await self.extract_location(classified_article)
                 if not article_with_location:
-                    article_queue.task_done()
                     continue
 
                 # Step 3: Geocode the location
                 geocoded_article = await geocoder.geocode_location(article_with_location)
                 if not geocoded_article:
-                    article_queue.task_done()
                     continue
 
                 # Step 4: Store in database
-                db.insert_article(geocoded_article)
-                logger.info(f"Successfully processed article: {article['title']}")
+                if writer:
+                    future = writer.submit(geocoded_article)
+                    future.add_done_callback(
+                        functools.partial(self._on_article_stored, article_queue, article)
+                    )
+                    handed_off = True
+                else:
+                    await call_db(db.insert_article, geocoded_article)
+                    logger.info(f"Successfully processed article: {article['title']}")
             except Exception as e:
                 logger.error(f"Error processing article: {e}")
             finally:
-                article_queue.task_done()
+                if not handed_off:
+                    article_queue.task_done()
+
+    def _on_article_stored(self, article_queue, article, future):
+        try:
+            if future.cancelled():
+                logger.error(f"Storing article was cancelled: {article['title']}")
+            elif future.exception():
+                logger.error(f"Error processing article: {future.exception()}")
+            elif future.result() == SPOOLED:
+                logger.warning(f"Article spooled until the database is available: {article['title']}")
+            else:
+                logger.info(f"Successfully processed article: {article['title']}")
+        finally:
+            article_queue.task_done()
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from config import WRITE_BATCH_SIZE, WRITE_MAX_LATENCY, WRITE_MAX_IN_FLIGHT
+from database import call_db
+from spool import ArticleSpool
+
+# Result reported for articles kept in the spool instead of the database
+SPOOLED = 'spooled'
+
+logger = logging.getLogger(__name__)
+
+class ArticleWriter:
+    """
+    Buffers geocoded articles and stores them with insert_articles,
+    flushing once WRITE_BATCH_SIZE articles are pending or the oldest pending
+    article has waited WRITE_MAX_LATENCY seconds.
+
+    Batches that fail, or that would exceed WRITE_MAX_IN_FLIGHT concurrent
+    writes while the database is saturated, go to the ArticleSpool instead of
+    being dropped, and the spool is drained after the next successful write.
+    """
+
+    def __init__(self, db, batch_size=WRITE_BATCH_SIZE, max_latency=WRITE_MAX_LATENCY,
+                 spool=None, max_in_flight=WRITE_MAX_IN_FLIGHT):
+        self.db = db
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.spool = spool if spool is not None else ArticleSpool()
+        self.max_in_flight = max_in_flight
+        self.pending = []
+        self._timer = None
+        self._flushes = set()
+        self._in_flight = 0
+        self._replaying = False
+
+    def submit(self, article):
+        """
+        Queue an article for the next flush. Returns a future that resolves to
+        the inserted row id (None if the URL already existed) or to the
+        exception raised while storing the batch.
+        """
+        future = asyncio.get_running_loop().create_future()
+        # Resolves to SPOOLED if the article was kept in the local spool
+        self.pending.append((article, future))
+        if len(self.pending) >= self.batch_size:
+            self._cancel_timer()
+            self._start_batch(self._take_pending())
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after(self.max_latency))
+        return future
+
+    async def write(self, article):
+        return await self.submit(article)
+
+    async def flush(self):
+        self._cancel_timer()
+        await self._write_batch(self._take_pending())
+
+    def _take_pending(self):
+        batch, self.pending = self.pending, []
+        return batch
+
+    def _cancel_timer(self):
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+
+    def _start_batch(self, batch):
+        task = asyncio.create_task(self._write_batch(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush_after(self, delay):
+        await asyncio.sleep(delay)
+        self._timer = None
+        self._start_batch(self._take_pending())
+
+    async def _write_batch(self, batch):
+        if not batch:
+            return
+
+        articles = [article for article, _ in batch]
+        if self._in_flight >= self.max_in_flight:
+            logger.warning(f"{self._in_flight} batches already in flight, spooling {len(batch)} articles")
+            await self._spool_batch(batch, None)
+            return
+
+        self._in_flight += 1
+        try:
+            results = await call_db(self.db.insert_articles, articles)
+        except Exception as e:
+            logger.error(f"Failed to store batch of {len(batch)} articles: {e}")
+            await self._spool_batch(batch, e)
+            return
+        finally:
+            self._in_flight -= 1
+
+        for (_, future), article_id in zip(batch, results):
+            if not future.done():
+                future.set_result(article_id)
+
+        if not self._replaying:
+            await self.replay_spool()
+
+    async def _spool_batch(self, batch, error):
+        try:
+            await call_db(self.spool.append, [article for article, _ in batch])
+        except Exception as e:
+            logger.error(f"Failed to spool batch of {len(batch)} articles: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error or e)
+            return
+
+        for _, future in batch:
+            if not future.done():
+                future.set_result(SPOOLED)
+
+    async def replay_spool(self):
+        """
+        Store spooled articles in batches, oldest first, until the spool is
+        empty or the database fails again. Returns the number replayed.
+        """
+        if self._replaying:
+            return 0
+        self._replaying = True
+        replayed = 0
+        try:
+            while True:
+                entries = await call_db(self.spool.peek, self.batch_size)
+                if not entries:
+                    break
+                await call_db(self.db.insert_articles, [article for _, article in entries])
+                await call_db(self.spool.remove, [spool_id for spool_id, _ in entries])
+                replayed += len(entries)
+        except Exception as e:
+            logger.error(f"Spool replay stopped after {replayed} articles: {e}")
+        finally:
+            self._replaying = False
+        if replayed:
+            logger.info(f"Replayed {replayed} spooled articles into the database")
+        return replayed
+
+    async def close(self):
+        """Flush whatever is still pending and wait for in-flight batches"""
+        await self.flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
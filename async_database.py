@@ -0,0 +1,191 @@
+import asyncpg
+import logging
+from config import DB_CONFIG, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DESCRIPTION_STORAGE
+from database import (
+    Database, call_db, INSERT_COLUMNS, UPSERT_ACTION, BATCH_INSERT_SQL, FEED_STATE_COLUMNS,
+    article_row, content_digests, url_digest
+)
+
+logger = logging.getLogger(__name__)
+
+class AsyncDatabase:
+    """
+    asyncpg-backed counterpart of Database with the same method names, all
+    of them coroutines. The pool is bound to the event loop that created it,
+    so it has to be closed before that loop ends (e.g. at the end of each
+    Lambda invocation, which runs in a fresh asyncio.run loop).
+    """
+
+    def __init__(self, description_storage=DESCRIPTION_STORAGE):
+        if description_storage not in ('inline', 'side'):
+            raise ValueError(f"Unknown description storage: {description_storage}")
+        self.pool = None
+        self.inline_descriptions = description_storage == 'inline'
+
+    async def connect(self):
+        if self.pool is None:
+            try:
+                self.pool = await asyncpg.create_pool(
+                    min_size=DB_POOL_MIN_SIZE,
+                    max_size=DB_POOL_MAX_SIZE,
+                    **DB_CONFIG
+                )
+                logger.info("Async database connection pool created")
+            except Exception as e:
+                logger.error(f"Error connecting to database: {e}")
+                raise
+        return self.pool
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+            logger.info("Async database connection pool closed")
+
+    async def initialize_db(self):
+        # Schema and partition management is rare and procedural, so it is
+        # shared with the psycopg2 implementation rather than duplicated
+        await call_db(Database(pooled=False).initialize_db)
+
+    async def insert_article(self, article):
+        try:
+            pool = await self.connect()
+            async with pool.acquire() as conn, conn.transaction():
+                article_id = await conn.fetchval(f"""
+                INSERT INTO news ({INSERT_COLUMNS})
+                VALUES ($1, $2, $3, ST_SetSRID(ST_MakePoint($4, $5), 4326), $6, $7, $8, $9, $10)
+                {UPSERT_ACTION}
+                RETURNING id
+                """, *article_row(article, self.inline_descriptions))
+                if article_id and not self.inline_descriptions:
+                    await self._store_descriptions(conn, [(article_id, article['description'])])
+            if article_id:
+                logger.info(f"Stored article with ID: {article_id}")
+            else:
+                logger.info(f"Article already stored unchanged: {article['title']}")
+            return article_id
+        except Exception as e:
+            logger.error(f"Error inserting article: {e}")
+            raise
+
+    async def insert_articles(self, articles):
+        """
+        Batch insert with the same contract as Database.insert_articles,
+        running the same BATCH_INSERT_SQL (asyncpg caches its prepared form
+        per connection).
+        """
+        if not articles:
+            return []
+        # DO UPDATE may not touch the same row twice in one statement
+        latest = dict(((article['url'], article['date']), article) for article in articles)
+        columns = list(zip(*(article_row(article, self.inline_descriptions) for article in latest.values())))
+        try:
+            pool = await self.connect()
+            async with pool.acquire() as conn, conn.transaction():
+                rows = await conn.fetch(BATCH_INSERT_SQL, *columns)
+                stored = dict(((row['url'], row['date']), row['id']) for row in rows)
+                results = []
+                for article in articles:
+                    key = (article['url'], article['date'])
+                    results.append(stored.get(key) if latest[key] is article else None)
+                if not self.inline_descriptions:
+                    await self._store_descriptions(conn, [
+                        (article_id, article['description'])
+                        for article_id, article in zip(results, articles) if article_id
+                    ])
+            logger.info(f"Stored {len(rows)} new or updated of {len(articles)} articles in one batch")
+            return results
+        except Exception as e:
+            logger.error(f"Error inserting article batch: {e}")
+            raise
+
+    async def update_article_text(self, article):
+        """Same contract as Database.update_article_text"""
+        content_hash, semantic_hash = content_digests(article)
+        try:
+            pool = await self.connect()
+            async with pool.acquire() as conn, conn.transaction():
+                article_id = await conn.fetchval("""
+                UPDATE news
+                SET title = $1, description = $2, content_hash = $3, semantic_hash = $4,
+                    processed_at = CURRENT_TIMESTAMP
+                WHERE url_hash = $5 AND date = $6 AND content_hash IS DISTINCT FROM $3
+                RETURNING id
+                """, article['title'], article['description'] if self.inline_descriptions else None,
+                    content_hash, semantic_hash, url_digest(article['url']), article['date'])
+                if article_id and not self.inline_descriptions:
+                    await self._store_descriptions(conn, [(article_id, article['description'])])
+            if article_id:
+                logger.info(f"Refreshed text of article {article_id}: {article['title']}")
+            return article_id
+        except Exception as e:
+            logger.error(f"Error updating article text: {e}")
+            raise
+
+    async def _store_descriptions(self, conn, pairs):
+        if pairs:
+            await conn.executemany("""
+            INSERT INTO news_descriptions (news_id, description) VALUES ($1, $2)
+            ON CONFLICT (news_id) DO UPDATE SET description = EXCLUDED.description
+            """, pairs)
+
+    async def get_feed_states(self):
+        try:
+            pool = await self.connect()
+            async with pool.acquire() as conn:
+                rows = await conn.fetch(f"SELECT feed_url, {', '.join(FEED_STATE_COLUMNS)} FROM feed_state")
+            return {row['feed_url']: {column: row[column] for column in FEED_STATE_COLUMNS} for row in rows}
+        except Exception as e:
+            logger.error(f"Error loading feed state: {e}")
+            return {}
+
+    async def save_feed_states(self, states):
+        if not states:
+            return
+        placeholders = ', '.join(f'${i}' for i in range(1, len(FEED_STATE_COLUMNS) + 2))
+        try:
+            pool = await self.connect()
+            async with pool.acquire() as conn:
+                await conn.executemany(f"""
+                INSERT INTO feed_state (feed_url, {', '.join(FEED_STATE_COLUMNS)}) VALUES ({placeholders})
+                ON CONFLICT (feed_url) DO UPDATE SET
+                {', '.join(f'{column} = EXCLUDED.{column}' for column in FEED_STATE_COLUMNS)}
+                """, [
+                    (feed_url, *(state.get(column) for column in FEED_STATE_COLUMNS))
+                    for feed_url, state in states.items()
+                ])
+        except Exception as e:
+            logger.error(f"Error saving feed state: {e}")
+            raise
+
+    async def get_processed_url_hashes(self, window_days):
+        try:
+            pool = await self.connect()
+            async with pool.acquire() as conn:
+                rows = await conn.fetch("""
+                SELECT url_hash, content_hash, semantic_hash, date FROM news
+                WHERE processed_at >= LOCALTIMESTAMP - make_interval(days => $1)
+                """, window_days)
+            return {
+                row['url_hash']: (row['content_hash'], row['semantic_hash'], row['date']) for row in rows
+            }
+        except Exception as e:
+            logger.error(f"Error fetching processed URL hashes: {e}")
+            return {}
+
+    async def get_existing_url_hashes(self, hashes):
+        if not hashes:
+            return {}
+        try:
+            pool = await self.connect()
+            async with pool.acquire() as conn:
+                rows = await conn.fetch(
+                    "SELECT url_hash, content_hash, semantic_hash, date FROM news WHERE url_hash = ANY($1::bytea[])",
+                    list(hashes)
+                )
+            return {
+                row['url_hash']: (row['content_hash'], row['semantic_hash'], row['date']) for row in rows
+            }
+        except Exception as e:
+            logger.error(f"Error looking up {len(hashes)} URL hashes: {e}")
+            raise
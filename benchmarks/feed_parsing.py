@@ -0,0 +1,98 @@
+"""
+Benchmark: event-loop latency and throughput while parsing many feeds.
+
+Parses synthetic RSS documents concurrently, the way FeedFetcher.fetch_feeds
+does, with each parser (feedparser, incremental iterparse) run directly on
+the event loop, in the default thread pool and in a process pool. A probe
+coroutine measures how late the loop wakes it up meanwhile. No network or
+database is needed:
+
+    python benchmarks/feed_parsing.py [feeds] [entries per feed] [workers]
+"""
+import asyncio
+import functools
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feed_reader import read_feed  # noqa: E402
+
+PROBE_INTERVAL = 0.005
+
+
+def synthetic_feed(feed, entries):
+    now = datetime.now(timezone.utc)
+    items = ''.join(f"""
+    <item>
+        <title>Bloqueo en la autopista {feed}-{i}</title>
+        <link>https://example.com/{feed}/{i}</link>
+        <description><![CDATA[<p>Manifestantes cierran la circulación en ambos sentidos.
+        <a href="https://example.com/{feed}/{i}">Leer más</a></p>]]></description>
+        <pubDate>{format_datetime(now - timedelta(minutes=i))}</pubDate>
+    </item>""" for i in range(entries))
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Feed {feed}</title>{items}</channel></rss>""".encode('utf-8')
+
+
+async def probe(lags, stop):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + PROBE_INTERVAL
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(loop.time() - expected)
+
+
+async def parse_all(feeds, mode, incremental, executor):
+    loop = asyncio.get_running_loop()
+
+    async def parse(raw):
+        work = functools.partial(read_feed, raw, None, frozenset(), incremental)
+        if mode == 'loop':
+            return work()
+        return await loop.run_in_executor(executor, work)
+
+    lags, stop = [], asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(parse(raw) for raw in feeds))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+    return elapsed, sum(len(articles) for _, articles, _, _ in results), lags
+
+
+def run(feed_count, entries, workers):
+    feeds = [synthetic_feed(feed, entries) for feed in range(feed_count)]
+    print(f"{feed_count} feeds x {entries} entries, {sum(map(len, feeds)) / 1e6:.1f} MB, "
+          f"{workers} parser processes")
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    # Start the workers before timing anything
+    list(pool.map(abs, range(workers)))
+    try:
+        for parser, incremental in (('feedparser', False), ('iterparse', True)):
+            for mode, executor in (('loop', None), ('thread', None), ('process', pool)):
+                elapsed, parsed, lags = asyncio.run(parse_all(feeds, mode, incremental, executor))
+                lags = sorted(lags) or [0.0]
+                p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+                print(f"{parser:>10} {mode:>7}: {feed_count / elapsed:7.1f} feeds/s "
+                      f"({parsed / elapsed:8.0f} entries/s), loop lag "
+                      f"median {statistics.median(lags) * 1e3:6.1f} ms, p99 {p99 * 1e3:7.1f} ms, "
+                      f"max {lags[-1] * 1e3:7.1f} ms")
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 120,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50,
+        int(sys.argv[3]) if len(sys.argv) > 3 else min(4, os.cpu_count() or 1)
+    )
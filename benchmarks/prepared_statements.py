@@ -0,0 +1,110 @@
+"""
+Micro-benchmark: plain INSERT text vs. the prepared statements, row by row
+(news_insert, the insert_article path) and in batches (news_insert_batch,
+the insert_articles path ArticleWriter uses, against execute_values).
+
+Every path inserts the same number of synthetic articles on one connection
+inside a transaction that is rolled back, so news is left untouched. Run from
+the repository root against a migrated database:
+
+    python benchmarks/prepared_statements.py [rows] [batch size]
+"""
+import os
+import sys
+import time
+import uuid
+from datetime import date
+from psycopg2.extras import execute_values
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import (  # noqa: E402
+    Database, INSERT_COLUMNS, INSERT_TEMPLATE, UPSERT_ACTION,
+    article_row, execute_prepared
+)
+
+
+def synthetic_articles(count):
+    run = uuid.uuid4().hex
+    for i in range(count):
+        yield {
+            'news_source': 'benchmark',
+            'title': f'Bloqueo en avenida {i}',
+            'description': 'Texto de prueba ' * 20,
+            'coordinates': [-99.13 + i * 1e-5, 19.43],
+            'type': 'social',
+            'date': date.today(),
+            'url': f'https://example.com/benchmark/{run}/{i}'
+        }
+
+
+def plain_insert(cursor, article):
+    cursor.execute(f"""
+    INSERT INTO news ({INSERT_COLUMNS})
+    VALUES {INSERT_TEMPLATE}
+    {UPSERT_ACTION}
+    RETURNING id
+    """, article_row(article))
+    cursor.fetchone()
+
+
+def prepared_insert(cursor, article):
+    execute_prepared(cursor, 'news_insert', article_row(article))
+    cursor.fetchone()
+
+
+def values_batch(cursor, articles):
+    execute_values(cursor, f"""
+    INSERT INTO news ({INSERT_COLUMNS})
+    VALUES %s
+    {UPSERT_ACTION}
+    RETURNING id, url, date
+    """, [article_row(article) for article in articles], template=INSERT_TEMPLATE, fetch=True)
+
+
+def prepared_batch(cursor, articles):
+    columns = [list(column) for column in zip(*(article_row(article) for article in articles))]
+    execute_prepared(cursor, 'news_insert_batch', columns)
+    cursor.fetchall()
+
+
+def batches(articles, size):
+    batch = []
+    for article in articles:
+        batch.append(article)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run(rows, batch_size):
+    db = Database(pooled=True)
+    with db.connection() as conn:
+        try:
+            with conn.cursor() as cursor:
+                for name, insert in (('plain', plain_insert), ('prepared', prepared_insert)):
+                    start = time.perf_counter()
+                    for article in synthetic_articles(rows):
+                        insert(cursor, article)
+                    elapsed = time.perf_counter() - start
+                    print(f"{name:>15}: {rows} rows in {elapsed:.3f}s "
+                          f"({elapsed / rows * 1e6:.0f} us/row)")
+                for name, insert in (('values batch', values_batch), ('prepared batch', prepared_batch)):
+                    start = time.perf_counter()
+                    for batch in batches(synthetic_articles(rows), batch_size):
+                        insert(cursor, batch)
+                    elapsed = time.perf_counter() - start
+                    print(f"{name:>15}: {rows} rows in batches of {batch_size} in {elapsed:.3f}s "
+                          f"({elapsed / rows * 1e6:.0f} us/row)")
+        finally:
+            conn.rollback()
+    db.close()
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    )
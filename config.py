@@ -18,8 +18,105 @@ DB_CONFIG = {
 POLLING_INTERVAL = int(os.getenv('POLLING_INTERVAL', 7200))
 MAX_RETRIES = int(os.getenv('MAX_RETRIES', 3))
 RETRY_DELAY = int(os.getenv('RETRY_DELAY', 10))
+# Retries back off exponentially from RETRY_BASE_DELAY seconds with full
+# jitter, waiting at most RETRY_MAX_DELAY (also the longest Retry-After obeyed)
+RETRY_BASE_DELAY = float(os.getenv('RETRY_BASE_DELAY', 1.0))
+RETRY_MAX_DELAY = float(os.getenv('RETRY_MAX_DELAY', RETRY_DELAY))
+
+# A feed failing this many polls in a row is skipped for BREAKER_COOLDOWN
+# seconds, doubling with every further failure up to BREAKER_MAX_COOLDOWN
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', 3))
+BREAKER_COOLDOWN = int(os.getenv('BREAKER_COOLDOWN', 1800))
+BREAKER_MAX_COOLDOWN = int(os.getenv('BREAKER_MAX_COOLDOWN', 86400))
 
 default_feeds = 'https://www.mural.com.mx/rss/portada.xml,https://www.elnorte.com/rss/portada.xml,https://www.jornada.com.mx/rss/estados.xml?v=1'
 RSS_FEEDS = os.getenv('RSS_FEEDS', default_feeds).split(',')
 
 VALID_CATEGORIES = ['crime', 'infrastructure', 'hazard', 'social']
+
+DB_POOL_ENABLED = os.getenv('DB_POOL_ENABLED', 'true').lower() == 'true'
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 1))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 5))
+DB_POOL_HEALTH_CHECK_INTERVAL = int(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', 60))
+
+WRITE_BATCH_SIZE = int(os.getenv('WRITE_BATCH_SIZE', 50))
+WRITE_MAX_LATENCY = float(os.getenv('WRITE_MAX_LATENCY', 2))
+
+# 'psycopg2' (thread pool backed) or 'asyncpg' (native asyncio)
+DB_DRIVER = os.getenv('DB_DRIVER', 'psycopg2')
+
+# Only URLs processed within this many days are preloaded for deduplication
+DEDUP_WINDOW_DAYS = int(os.getenv('DEDUP_WINDOW_DAYS', 7))
+# 'window' preloads recent URLs at startup, 'batch' skips the preload and
+# resolves each polling cycle's candidate URLs with a single query
+DEDUP_MODE = os.getenv('DEDUP_MODE', 'window')
+
+# Monthly news partitions are created this many months ahead of today
+PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', 3))
+
+# Zoom levels whose web mercator tile grid the heatmap rollup is kept for
+HEATMAP_ZOOM_LEVELS = [int(z) for z in os.getenv('HEATMAP_ZOOM_LEVELS', '4,6,8,10,12').split(',')]
+HEATMAP_REFRESH_INTERVAL = int(os.getenv('HEATMAP_REFRESH_INTERVAL', 300))
+
+TILE_CACHE_SIZE = int(os.getenv('TILE_CACHE_SIZE', 2048))
+# Optional second-level on-disk tile cache; empty disables it
+TILE_CACHE_DIR = os.getenv('TILE_CACHE_DIR', '')
+# Size limit of the disk tile cache; least recently used tiles go first
+TILE_CACHE_DISK_BYTES = int(os.getenv('TILE_CACHE_DISK_BYTES', 512 * 1024 * 1024))
+TILE_MAX_ZOOM = int(os.getenv('TILE_MAX_ZOOM', 16))
+TILE_MAX_FEATURES = int(os.getenv('TILE_MAX_FEATURES', 5000))
+TILE_INVALIDATION_INTERVAL = int(os.getenv('TILE_INVALIDATION_INTERVAL', 60))
+TILE_SERVER_PORT = int(os.getenv('TILE_SERVER_PORT', 8080))
+
+# PREPARE hot statements once per pooled connection and EXECUTE them by name
+DB_PREPARED_STATEMENTS = os.getenv('DB_PREPARED_STATEMENTS', 'true').lower() == 'true'
+
+# Articles that cannot be stored are kept here and replayed later
+SPOOL_PATH = os.getenv('SPOOL_PATH', '/tmp/news_spool.sqlite3')
+# Batches beyond this many in-flight writes are spooled instead of queued on the DB
+WRITE_MAX_IN_FLIGHT = int(os.getenv('WRITE_MAX_IN_FLIGHT', 4))
+
+# 'inline' keeps descriptions in news, 'side' stores them in news_descriptions
+# so map queries scan a compact news heap
+DESCRIPTION_STORAGE = os.getenv('DESCRIPTION_STORAGE', 'inline')
+
+# Rows older than this many days are exported to ARCHIVE_PATH and removed
+# from Postgres; whole monthly partitions are archived at once
+RETENTION_DAYS = int(os.getenv('RETENTION_DAYS', 365))
+# Local directory or pyarrow filesystem URI (e.g. s3://bucket/news-archive)
+ARCHIVE_PATH = os.getenv('ARCHIVE_PATH', '/tmp/news_archive')
+ARCHIVE_CHUNK_SIZE = int(os.getenv('ARCHIVE_CHUNK_SIZE', 10000))
+# Rows per fetch and per Arrow record batch when streaming news out
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 10000))
+
+# Adaptive per-feed polling: each feed is polled often enough to see about
+# FEED_TARGET_NEW_PER_POLL new entries per poll at its observed publish
+# rate, within [FEED_MIN_INTERVAL, FEED_MAX_INTERVAL] seconds and with
+# +/- FEED_SCHEDULE_JITTER relative jitter. New feeds start at POLLING_INTERVAL
+FEED_MIN_INTERVAL = int(os.getenv('FEED_MIN_INTERVAL', 300))
+FEED_MAX_INTERVAL = int(os.getenv('FEED_MAX_INTERVAL', 21600))
+FEED_TARGET_NEW_PER_POLL = float(os.getenv('FEED_TARGET_NEW_PER_POLL', 3))
+FEED_SCHEDULE_JITTER = float(os.getenv('FEED_SCHEDULE_JITTER', 0.1))
+# Seconds between scheduled Lambda invocations (the EventBridge rate); each
+# run also fetches the feeds falling due before the next one
+LAMBDA_SCHEDULE_INTERVAL = int(os.getenv('LAMBDA_SCHEDULE_INTERVAL', 900))
+
+# Read feeds lazily with iterparse and stop at the first entry older than the
+# feed's high-water mark or after this many consecutive known URLs; 'false'
+# parses every entry with feedparser
+FEED_INCREMENTAL_PARSING = os.getenv('FEED_INCREMENTAL_PARSING', 'true').lower() == 'true'
+FEED_KNOWN_RUN = int(os.getenv('FEED_KNOWN_RUN', 5))
+
+# Processes parsing downloaded feeds off the event loop; 0 parses them in the
+# default thread pool instead (always on Lambda, which lacks /dev/shm)
+FEED_PARSE_WORKERS = int(os.getenv(
+    'FEED_PARSE_WORKERS', 0 if os.getenv('AWS_LAMBDA_FUNCTION_NAME') else min(4, os.cpu_count() or 1)
+))
+
+# Per-host throttle for feed downloads: concurrent requests per host, and a
+# token bucket of FEED_HOST_RATE requests per second with bursts of
+# FEED_HOST_BURST. FEED_MAX_CONNECTIONS caps open connections across all hosts
+FEED_HOST_CONCURRENCY = int(os.getenv('FEED_HOST_CONCURRENCY', 2))
+FEED_HOST_RATE = float(os.getenv('FEED_HOST_RATE', 1.0))
+FEED_HOST_BURST = int(os.getenv('FEED_HOST_BURST', 4))
+FEED_MAX_CONNECTIONS = int(os.getenv('FEED_MAX_CONNECTIONS', 100))
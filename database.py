@@ -1,106 +1,721 @@
 import psycopg2
+from psycopg2 import pool, sql
 from psycopg2.extras import execute_values
+import asyncio
+import hashlib
+import html
+import functools
 import logging
-from config import DB_CONFIG
+import re
+import threading
+import time
+import unicodedata
+from datetime import datetime
+from contextlib import contextmanager
+from migrations import (
+    SCHEMA_VERSION, schema_is_current, migrate, ensure_partitions, next_month
+)
+from config import (
+    DB_CONFIG, DB_POOL_ENABLED, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE,
+    DB_POOL_HEALTH_CHECK_INTERVAL, DB_DRIVER, PARTITION_MONTHS_AHEAD,
+    DB_PREPARED_STATEMENTS, DESCRIPTION_STORAGE
+)
 
 logger = logging.getLogger(__name__)
 
+class PreparingConnection(psycopg2.extensions.connection):
+    """Connection remembering which PREPARED_STATEMENTS exist in its session"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+# The pool is kept at module level so that warm Lambda invocations, which
+# re-run lambda_main() but keep imported modules, reuse open connections
+_pool = None
+_pool_lock = threading.Lock()
+# ThreadedConnectionPool raises instead of waiting when it is exhausted, so
+# callers queue on this semaphore before borrowing a connection
+_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX_SIZE)
+_last_used = {}
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            _pool = pool.ThreadedConnectionPool(
+                DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE,
+                connection_factory=PreparingConnection, **DB_CONFIG
+            )
+            _last_used.clear()
+            logger.info(f"Database connection pool created (min={DB_POOL_MIN_SIZE}, max={DB_POOL_MAX_SIZE})")
+        return _pool
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and not _pool.closed:
+            _pool.closeall()
+            logger.info("Database connection pool closed")
+        _pool = None
+        _last_used.clear()
+
+
+def _is_healthy(conn):
+    """Cheap liveness check, only run on connections idle for a while"""
+    if conn.closed:
+        return False
+    idle = time.monotonic() - _last_used.get(id(conn), 0)
+    if idle < DB_POOL_HEALTH_CHECK_INTERVAL:
+        return True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error as e:
+        logger.warning(f"Discarding unhealthy pooled connection: {e}")
+        return False
+
+
+def _acquire():
+    _pool_slots.acquire()
+    try:
+        conn_pool = get_pool()
+        # Every idle connection may have gone stale (e.g. after a long Lambda
+        # freeze), so allow one attempt per pool slot plus a fresh connection
+        for _ in range(DB_POOL_MAX_SIZE + 1):
+            conn = conn_pool.getconn()
+            if _is_healthy(conn):
+                return conn
+            _last_used.pop(id(conn), None)
+            conn_pool.putconn(conn, close=True)
+        raise psycopg2.OperationalError("Could not obtain a healthy database connection")
+    except Exception:
+        _pool_slots.release()
+        raise
+
+
+def _release(conn, broken=False):
+    try:
+        conn_pool = get_pool()
+        if broken or conn.closed:
+            _last_used.pop(id(conn), None)
+            conn_pool.putconn(conn, close=True)
+        else:
+            _last_used[id(conn)] = time.monotonic()
+            conn_pool.putconn(conn)
+    except pool.PoolError as e:
+        # The pool was closed and recreated while the connection was out
+        logger.warning(f"Dropping connection not owned by current pool: {e}")
+        conn.close()
+    finally:
+        _pool_slots.release()
+
+
+# Unique keys of the partitioned news table must include date, so this only
+# catches repeats of a URL under the same date; DedupIndex supplies the stored
+# date of known URLs so an edited entry with a new pubDate updates its row
+URL_CONFLICT_TARGET = "(url_hash, date)"
+INSERT_COLUMNS = "news_source, title, description, coordinates, type, date, url, content_hash, semantic_hash"
+INSERT_TEMPLATE = "(%s, %s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 4326), %s, %s, %s, %s, %s)"
+
+# A stored URL is only rewritten when its content digest changed, so
+# re-inserting an unchanged article stays a no-op (and returns no id). The
+# replaced position is kept so the tile server can evict its tiles too
+UPSERT_ACTION = f"""ON CONFLICT {URL_CONFLICT_TARGET} DO UPDATE SET
+    title = EXCLUDED.title, description = EXCLUDED.description,
+    coordinates = EXCLUDED.coordinates, previous_coordinates = news.coordinates, type = EXCLUDED.type,
+    content_hash = EXCLUDED.content_hash, semantic_hash = EXCLUDED.semantic_hash,
+    processed_at = CURRENT_TIMESTAMP
+WHERE news.content_hash IS DISTINCT FROM EXCLUDED.content_hash"""
+
+
+# Staged rows for bulk_load_articles, one per URL. The dedup index is not
+# consulted on this path, so a URL that is already stored keeps its stored
+# date here and hits URL_CONFLICT_TARGET instead of adding a second row
+STAGED_SELECT = """
+SELECT DISTINCT ON (s.url)
+    s.news_source, s.title, s.description, s.lon, s.lat, s.type,
+    COALESCE(stored.date, s.date) AS date, s.url, s.content_hash, s.semantic_hash
+FROM news_staging s
+LEFT JOIN LATERAL (
+    SELECT n.date FROM news n WHERE n.url_hash = decode(md5(s.url), 'hex') ORDER BY n.date LIMIT 1
+) stored ON true
+ORDER BY s.url
+"""
+
+
+# feed_state columns besides feed_url, as keys of FeedFetcher's state dicts
+FEED_STATE_COLUMNS = (
+    'etag', 'last_modified', 'body_bytes', 'parse_seconds', 'checked_at', 'updated_at',
+    'entries_per_hour', 'poll_interval', 'next_due_at', 'high_water_mark',
+    'failure_count', 'open_until'
+)
+
+
+# Batch insert taking one array per column, expanded with unnest, so the
+# statement text is the same for every batch size and can be prepared once
+BATCH_INSERT_SQL = f"""INSERT INTO news ({INSERT_COLUMNS})
+SELECT news_source, title, description,
+    ST_SetSRID(ST_MakePoint(lon, lat), 4326), type, date, url,
+    content_hash, semantic_hash
+FROM unnest($1::text[], $2::text[], $3::text[], $4::float8[],
+            $5::float8[], $6::text[], $7::date[], $8::text[],
+            $9::bytea[], $10::bytea[])
+    AS batch(news_source, title, description, lon, lat, type, date, url,
+             content_hash, semantic_hash)
+{UPSERT_ACTION}
+RETURNING id, url, date"""
+
+
+# Hot statements prepared once per connection: name -> (parameter types, SQL)
+PREPARED_STATEMENTS = {
+    'news_insert': (
+        "(text, text, text, float8, float8, text, date, text, bytea, bytea)",
+        f"""INSERT INTO news ({INSERT_COLUMNS})
+        VALUES ($1, $2, $3, ST_SetSRID(ST_MakePoint($4, $5), 4326), $6, $7, $8, $9, $10)
+        {UPSERT_ACTION}
+        RETURNING id"""
+    ),
+    'news_insert_batch': (
+        "(text[], text[], text[], float8[], float8[], text[], date[], text[], bytea[], bytea[])",
+        BATCH_INSERT_SQL
+    ),
+    'news_existing_url_hashes': (
+        "(bytea[])",
+        "SELECT url_hash, content_hash, semantic_hash, date FROM news WHERE url_hash = ANY($1)"
+    ),
+    'news_processed_url_hashes': (
+        "(integer)",
+        """SELECT url_hash, content_hash, semantic_hash, date FROM news
+        WHERE processed_at >= LOCALTIMESTAMP - make_interval(days => $1)"""
+    ),
+}
+
+
+def execute_prepared(cursor, name, params):
+    """
+    EXECUTE a PREPARED_STATEMENTS entry, preparing it first if this
+    connection's session has not seen it yet. Prepared statements are
+    session state and survive rollbacks, so each pooled connection parses and
+    plans a statement once for its whole lifetime.
+    """
+    conn = cursor.connection
+    if name not in conn.prepared:
+        types, statement = PREPARED_STATEMENTS[name]
+        cursor.execute(f"PREPARE {name} {types} AS {statement}")
+        conn.prepared.add(name)
+    placeholders = ', '.join(['%s'] * len(params))
+    cursor.execute(f"EXECUTE {name} ({placeholders})", params)
+
+
+def url_digest(url):
+    """Python side of news.url_hash (md5 of the UTF-8 URL, as the server computes it)"""
+    return hashlib.md5(url.encode('utf-8')).digest()
+
+
+_MARKUP = re.compile(r'<[^>]*>')
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def content_digests(article):
+    """
+    (content_hash, semantic_hash) of an article's title and description.
+    content_hash changes on any edit. semantic_hash ignores cosmetic ones
+    (markup, entities, case, punctuation, whitespace), so a change in
+    content_hash alone means the stored classification and location still
+    apply.
+    """
+    text = f"{article['title']}\n{article['description']}"
+    normalized = unicodedata.normalize('NFKC', html.unescape(_MARKUP.sub(' ', text))).casefold()
+    normalized = ' '.join(_NON_WORD.sub(' ', normalized).split())
+    return (
+        hashlib.md5(text.encode('utf-8')).digest(),
+        hashlib.md5(normalized.encode('utf-8')).digest()
+    )
+
+
+def article_row(article, inline_description=True):
+    """
+    Parameters for INSERT_TEMPLATE, in INSERT_COLUMNS order. With
+    inline_description=False the description is left out of news and has to
+    be written to news_descriptions.
+    """
+    return (
+        article['news_source'],
+        article['title'],
+        article['description'] if inline_description else None,
+        article['coordinates'][0],
+        article['coordinates'][1],
+        article['type'],
+        article['date'],
+        article['url'],
+        *content_digests(article)
+    )
+
+
+def _digest_map(rows):
+    """{url_hash: (content_hash, semantic_hash, date)} from (url_hash, content_hash, semantic_hash, date) rows"""
+    return {
+        bytes(url_hash): (
+            *(bytes(digest) if digest is not None else None for digest in digests), day
+        )
+        for url_hash, *digests, day in rows
+    }
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bytes):
+        return '\\\\x' + value.hex()
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r')
+            .replace('\t', '\\t'))
+
+
+class _CopyStream:
+    """
+    Read-only file object producing COPY text-format rows on demand, so
+    copy_expert can stream an arbitrarily long iterable of articles without
+    materializing it.
+    """
+
+    def __init__(self, articles):
+        self.articles = iter(articles)
+        self.buffer = bytearray()
+        self.rows = 0
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            article = next(self.articles, None)
+            if article is None:
+                break
+            line = '\t'.join(_copy_value(value) for value in article_row(article)) + '\n'
+            self.buffer += line.encode('utf-8')
+            self.rows += 1
+        if size < 0:
+            size = len(self.buffer)
+        chunk = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return chunk
+
+
 class Database:
-    def __init__(self):
-        self.conn = None
-        self.cursor = None
+    def __init__(self, pooled=DB_POOL_ENABLED, prepared=DB_PREPARED_STATEMENTS,
+                 description_storage=DESCRIPTION_STORAGE):
+        if description_storage not in ('inline', 'side'):
+            raise ValueError(f"Unknown description storage: {description_storage}")
+        self.pooled = pooled
+        self.inline_descriptions = description_storage == 'inline'
+        # A dedicated connection lives for one call, so preparing would only
+        # add a round-trip there
+        self.prepared = prepared and pooled
 
     def connect(self):
         try:
-            self.conn = psycopg2.connect(**DB_CONFIG)
-            self.conn.autocommit = False
-            self.cursor = self.conn.cursor()
+            conn = psycopg2.connect(connection_factory=PreparingConnection, **DB_CONFIG)
+            conn.autocommit = False
             logger.info("Database connection established successfully")
+            return conn
         except Exception as e:
             logger.error(f"Error connecting to database: {e}")
             raise
 
-    def disconnect(self):
-        if self.cursor:
-            self.cursor.close()
-        if self.conn:
-            self.conn.close()
-            logger.info("Database connection closed")
+    def close(self):
+        if self.pooled:
+            close_pool()
+
+    @contextmanager
+    def connection(self):
+        """
+        Yield a connection, borrowed from the shared pool in pooled mode or
+        opened just for this call otherwise. The transaction is rolled back
+        on error; connections that failed at the network level are dropped
+        from the pool so the next caller reconnects.
+        """
+        conn = _acquire() if self.pooled else self.connect()
+        broken = False
+        try:
+            yield conn
+        except Exception as e:
+            broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+            raise
+        finally:
+            if self.pooled:
+                _release(conn, broken)
+            else:
+                conn.close()
+                logger.info("Database connection closed")
+
+    def _execute(self, cursor, name, params):
+        """Run a PREPARED_STATEMENTS entry, by name or as plain SQL text"""
+        if self.prepared:
+            execute_prepared(cursor, name, params)
+        else:
+            types, statement = PREPARED_STATEMENTS[name]
+            cursor.execute(re.sub(r'\$\d+', '%s', statement), params)
 
     def initialize_db(self):
+        """
+        Bring the schema up to date. When the recorded schema version is
+        current and the upcoming partitions exist this is a single query and
+        no DDL runs.
+        """
         try:
-            self.connect()
-            self.cursor.execute("""
-            CREATE EXTENSION IF NOT EXISTS postgis;
-
-            CREATE TABLE IF NOT EXISTS news (
-                id SERIAL PRIMARY KEY,
-                news_source TEXT,
-                title TEXT,
-                description TEXT,
-                coordinates GEOGRAPHY(POINT, 4326),
-                type TEXT CHECK (type IN ('crime', 'infrastructure', 'hazard', 'social')),
-                date DATE,
-                url TEXT UNIQUE,
-                processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE INDEX IF NOT EXISTS news_coordinates_idx ON news USING GIST(coordinates);
-            CREATE INDEX IF NOT EXISTS news_type_idx ON news(type);
-            CREATE INDEX IF NOT EXISTS news_date_idx ON news(date);
-            """)
-            self.conn.commit()
-            logger.info("Database initialized successfully")
+            with self.connection() as conn:
+                with conn.cursor() as cursor:
+                    if schema_is_current(cursor, PARTITION_MONTHS_AHEAD):
+                        conn.commit()
+                        logger.info("Database schema is up to date")
+                        return
+                    previous = migrate(cursor)
+                    ensure_partitions(cursor, PARTITION_MONTHS_AHEAD)
+                conn.commit()
+            logger.info(f"Database initialized successfully (schema version {previous} -> {SCHEMA_VERSION})")
         except Exception as e:
             logger.error(f"Error initializing database: {e}")
-            if self.conn:
-                self.conn.rollback()
             raise
-        finally:
-            self.disconnect()
+
+    def ensure_partitions(self, months_ahead=PARTITION_MONTHS_AHEAD):
+        """Create monthly partitions from the current month up to `months_ahead` months out"""
+        try:
+            with self.connection() as conn:
+                with conn.cursor() as cursor:
+                    ensure_partitions(cursor, months_ahead)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error creating partitions: {e}")
+            raise
+
+    def detach_partitions_before(self, cutoff):
+        """
+        Detach every monthly partition whose range ends on or before `cutoff`.
+        The detached tables keep their data and can be archived or dropped
+        separately. Returns their names.
+        """
+        try:
+            with self.connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                    SELECT child.relname
+                    FROM pg_inherits
+                    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                    WHERE parent.relname = 'news' AND child.relname LIKE 'news\\_p%'
+                    """)
+                    detached = []
+                    for (name,) in cursor.fetchall():
+                        month = datetime.strptime(name, 'news_p%Y_%m').date()
+                        if next_month(month) <= cutoff:
+                            cursor.execute(
+                                sql.SQL("ALTER TABLE news DETACH PARTITION {}").format(sql.Identifier(name))
+                            )
+                            detached.append(name)
+                conn.commit()
+            logger.info(f"Detached {len(detached)} partitions older than {cutoff}")
+            return sorted(detached)
+        except Exception as e:
+            logger.error(f"Error detaching partitions: {e}")
+            raise
 
     def insert_article(self, article):
         try:
-            self.connect()
-            self.cursor.execute("""
-            INSERT INTO news (news_source, title, description, coordinates, type, date, url)
-            VALUES (%s, %s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 4326), %s, %s, %s)
-            ON CONFLICT (url) DO NOTHING
-            RETURNING id
-            """, (
-                article['news_source'],
-                article['title'],
-                article['description'],
-                article['coordinates'][0],
-                article['coordinates'][1],
-                article['type'],
-                article['date'],
-                article['url']
-            ))
-            result = self.cursor.fetchone()
-            self.conn.commit()
+            with self.connection() as conn:
+                with conn.cursor() as cursor:
+                    self._execute(
+                        cursor, 'news_insert', article_row(article, self.inline_descriptions)
+                    )
+                    result = cursor.fetchone()
+                    if result and not self.inline_descriptions:
+                        self._store_descriptions(cursor, [(result[0], article['description'])])
+                conn.commit()
             if result:
-                logger.info(f"Inserted article with ID: {result[0]}")
+                logger.info(f"Stored article with ID: {result[0]}")
                 return result[0]
             else:
-                logger.info(f"Article already exists in database: {article['title']}")
+                logger.info(f"Article already stored unchanged: {article['title']}")
                 return None
         except Exception as e:
             logger.error(f"Error inserting article: {e}")
-            if self.conn:
-                self.conn.rollback()
             raise
-        finally:
-            self.disconnect()
 
-    def get_processed_urls(self):
+    def insert_articles(self, articles):
+        """
+        Insert a batch of articles with the prepared news_insert_batch
+        statement (one array per column) and one commit. Returns a list
+        aligned with `articles` holding the row id of each new or updated
+        article, or None where the URL was already stored with the same
+        content (or is superseded by a later repeat within the batch).
+        """
+        if not articles:
+            return []
+        # DO UPDATE may not touch the same row twice in one statement
+        latest = dict(((article['url'], article['date']), article) for article in articles)
+        columns = [
+            list(column)
+            for column in zip(*(article_row(article, self.inline_descriptions) for article in latest.values()))
+        ]
         try:
-            self.connect()
-            self.cursor.execute("SELECT url FROM news")
-            urls = {row[0] for row in self.cursor.fetchall()}
-            return urls
+            with self.connection() as conn:
+                with conn.cursor() as cursor:
+                    self._execute(cursor, 'news_insert_batch', columns)
+                    rows = cursor.fetchall()
+                    stored = dict(((url, day), article_id) for article_id, url, day in rows)
+                    results = []
+                    for article in articles:
+                        key = (article['url'], article['date'])
+                        results.append(stored.get(key) if latest[key] is article else None)
+                    if not self.inline_descriptions:
+                        self._store_descriptions(cursor, [
+                            (article_id, article['description'])
+                            for article_id, article in zip(results, articles) if article_id
+                        ])
+                conn.commit()
+            logger.info(f"Stored {len(rows)} new or updated of {len(articles)} articles in one batch")
+            return results
         except Exception as e:
-            logger.error(f"Error fetching processed URLs: {e}")
-            return set()
-        finally:
-            self.disconnect()
+            logger.error(f"Error inserting article batch: {e}")
+            raise
+
+    def _store_descriptions(self, cursor, pairs):
+        """Write (news id, description) pairs to the news_descriptions side table"""
+        if pairs:
+            execute_values(cursor, """
+            INSERT INTO news_descriptions (news_id, description) VALUES %s
+            ON CONFLICT (news_id) DO UPDATE SET description = EXCLUDED.description
+            """, pairs)
+
+    def update_article_text(self, article):
+        """
+        Store a cosmetic edit (same semantic_hash) of an already stored
+        article: title, description and digests are replaced while the
+        stored type and coordinates are kept. Returns the row id, or None if
+        the URL is not stored or already has this content.
+        """
+        content_hash, semantic_hash = content_digests(article)
+        try:
+            with self.connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                    UPDATE news
+                    SET title = %s, description = %s, content_hash = %s, semantic_hash = %s,
+                        processed_at = CURRENT_TIMESTAMP
+                    WHERE url_hash = %s AND date = %s AND content_hash IS DISTINCT FROM %s
+                    RETURNING id
+                    """, (
+                        article['title'],
+                        article['description'] if self.inline_descriptions else None,
+                        content_hash, semantic_hash, url_digest(article['url']), article['date'],
+                        content_hash
+                    ))
+                    result = cursor.fetchone()
+                    if result and not self.inline_descriptions:
+                        self._store_descriptions(cursor, [(result[0], article['description'])])
+                conn.commit()
+            if result:
+                logger.info(f"Refreshed text of article {result[0]}: {article['title']}")
+            return result[0] if result else None
+        except Exception as e:
+            logger.error(f"Error updating article text: {e}")
+            raise
+
+    def move_descriptions_to_side_table(self, batch_size=1000):
+        """
+        Move descriptions already stored in news into news_descriptions, one
+        short transaction per batch so normal inserts keep flowing. The freed
+        heap space is reused by new rows; run VACUUM FULL (or pg_repack) on
+        the partitions to actually shrink them.
+        """
+        moved = 0
+        try:
+            while True:
+                with self.connection() as conn:
+                    with conn.cursor() as cursor:
+                        cursor.execute("""
+                        WITH batch AS (
+                            SELECT id, date, description FROM news
+                            WHERE description IS NOT NULL
+                            LIMIT %s
+                            FOR UPDATE SKIP LOCKED
+                        ),
+                        copied AS (
+                            INSERT INTO news_descriptions (news_id, description)
+                            SELECT id, description FROM batch
+                            ON CONFLICT (news_id) DO UPDATE SET description = EXCLUDED.description
+                        )
+                        UPDATE news SET description = NULL
+                        FROM batch
+                        WHERE news.id = batch.id AND news.date = batch.date
+                        """, (batch_size,))
+                        count = cursor.rowcount
+                    conn.commit()
+                moved += count
+                if count == 0:
+                    break
+            logger.info(f"Moved {moved} descriptions into news_descriptions")
+            return moved
+        except Exception as e:
+            logger.error(f"Error moving descriptions after {moved} rows: {e}")
+            raise
+
+    def bulk_load_articles(self, articles):
+        """
+        Bulk ingest for backfills: stream `articles` (any iterable, typically a
+        generator) into the unlogged news_staging table with COPY, then merge
+        into news with a single INSERT ... SELECT. Memory stays flat regardless
+        of how many articles are loaded. Returns the number of new rows.
+        """
+        try:
+            with self.connection() as conn:
+                with conn.cursor() as cursor:
+                    # TRUNCATE takes an exclusive lock, so concurrent bulk
+                    # loads queue up instead of merging each other's rows
+                    cursor.execute("TRUNCATE news_staging")
+                    stream = _CopyStream(articles)
+                    cursor.copy_expert(
+                        "COPY news_staging (news_source, title, description, lon, lat, type, date, url, "
+                        "content_hash, semantic_hash) FROM STDIN",
+                        stream
+                    )
+                    if self.inline_descriptions:
+                        cursor.execute(f"""
+                        WITH staged AS ({STAGED_SELECT})
+                        INSERT INTO news ({INSERT_COLUMNS})
+                        SELECT news_source, title, description,
+                            ST_SetSRID(ST_MakePoint(lon, lat), 4326), type, date, url,
+                            content_hash, semantic_hash
+                        FROM staged
+                        {UPSERT_ACTION}
+                        """)
+                    else:
+                        cursor.execute(f"""
+                        WITH staged AS ({STAGED_SELECT}),
+                        inserted AS (
+                            INSERT INTO news ({INSERT_COLUMNS})
+                            SELECT news_source, title, NULL,
+                                ST_SetSRID(ST_MakePoint(lon, lat), 4326), type, date, url,
+                                content_hash, semantic_hash
+                            FROM staged
+                            {UPSERT_ACTION}
+                            RETURNING id, url
+                        )
+                        INSERT INTO news_descriptions (news_id, description)
+                        SELECT inserted.id, staged.description
+                        FROM inserted JOIN staged USING (url)
+                        ON CONFLICT (news_id) DO UPDATE SET description = EXCLUDED.description
+                        """)
+                    inserted = cursor.rowcount
+                    cursor.execute("TRUNCATE news_staging")
+                conn.commit()
+            logger.info(f"Bulk loaded {inserted} new articles out of {stream.rows} staged")
+            return inserted
+        except Exception as e:
+            logger.error(f"Error bulk loading articles: {e}")
+            raise
+
+    def get_feed_states(self):
+        """Stored feed_state rows as {feed_url: {column: value}}"""
+        try:
+            with self.connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"SELECT feed_url, {', '.join(FEED_STATE_COLUMNS)} FROM feed_state")
+                    states = {
+                        feed_url: dict(zip(FEED_STATE_COLUMNS, values))
+                        for feed_url, *values in cursor.fetchall()
+                    }
+                conn.commit()
+            return states
+        except Exception as e:
+            logger.error(f"Error loading feed state: {e}")
+            return {}
+
+    def save_feed_states(self, states):
+        """Upsert {feed_url: {column: value}} into feed_state"""
+        if not states:
+            return
+        try:
+            with self.connection() as conn:
+                with conn.cursor() as cursor:
+                    execute_values(cursor, f"""
+                    INSERT INTO feed_state (feed_url, {', '.join(FEED_STATE_COLUMNS)}) VALUES %s
+                    ON CONFLICT (feed_url) DO UPDATE SET
+                    {', '.join(f'{column} = EXCLUDED.{column}' for column in FEED_STATE_COLUMNS)}
+                    """, [
+                        (feed_url, *(state.get(column) for column in FEED_STATE_COLUMNS))
+                        for feed_url, state in states.items()
+                    ])
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error saving feed state: {e}")
+            raise
+
+    def get_processed_url_hashes(self, window_days):
+        """
+        url_hash digests of articles processed in the last `window_days`
+        days, mapped to their (content_hash, semantic_hash, date)
+        """
+        try:
+            with self.connection() as conn:
+                with conn.cursor() as cursor:
+                    self._execute(cursor, 'news_processed_url_hashes', (window_days,))
+                    hashes = _digest_map(cursor.fetchall())
+                conn.commit()
+            return hashes
+        except Exception as e:
+            logger.error(f"Error fetching processed URL hashes: {e}")
+            return {}
+
+    def get_existing_url_hashes(self, hashes):
+        """
+        The url_hash digests already stored, mapped to their (content_hash,
+        semantic_hash, date), resolved with one index lookup
+        """
+        if not hashes:
+            return {}
+        try:
+            with self.connection() as conn:
+                with conn.cursor() as cursor:
+                    self._execute(
+                        cursor, 'news_existing_url_hashes',
+                        ([psycopg2.Binary(digest) for digest in hashes],)
+                    )
+                    existing = _digest_map(cursor.fetchall())
+                conn.commit()
+            return existing
+        except Exception as e:
+            logger.error(f"Error looking up {len(hashes)} URL hashes: {e}")
+            raise
+
+
+def create_database(driver=DB_DRIVER):
+    """Build the Database implementation selected by DB_DRIVER"""
+    if driver == 'asyncpg':
+        from async_database import AsyncDatabase
+        return AsyncDatabase()
+    if driver != 'psycopg2':
+        raise ValueError(f"Unknown database driver: {driver}")
+    return Database()
+
+
+async def call_db(method, *args, **kwargs):
+    """
+    Call a Database or AsyncDatabase method from a coroutine without
+    blocking the event loop: coroutine methods are awaited directly and
+    synchronous ones run in the default executor.
+    """
+    if asyncio.iscoroutinefunction(method):
+        return await method(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(method, *args, **kwargs))
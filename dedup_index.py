@@ -0,0 +1,104 @@
+import logging
+import time
+from database import call_db, url_digest, content_digests
+from config import DEDUP_WINDOW_DAYS, DEDUP_MODE
+
+logger = logging.getLogger(__name__)
+
+class DedupIndex:
+    """
+    Bounded index of already processed article URLs, keyed by their 16 byte
+    url_hash digest. In 'window' mode startup
+    only loads URLs processed within the last `window_days` days (RSS feeds
+    only carry recent entries); in 'batch' mode nothing is preloaded. Either
+    way URLs seen by this process are remembered for the window, and each
+    cycle's candidates missing locally are resolved against news.url_hash
+    with a single query.
+
+    Every URL is remembered with its (content_hash, semantic_hash), so an
+    entry whose title or description was edited after publication comes
+    back out of filter_new() tagged with article['change']: 'cosmetic' when
+    only markup, case, punctuation or whitespace changed (the stored
+    classification and location still apply), 'content' otherwise.
+
+    news is unique on (url_hash, date) only, since a partitioned table's
+    unique keys must include the partition key. The index therefore also
+    remembers the date each URL is stored under, and a changed article is
+    handed back with that date: an entry whose pubDate moved still updates
+    its existing row instead of adding a second one for the same URL.
+    """
+
+    def __init__(self, db, window_days=DEDUP_WINDOW_DAYS, mode=DEDUP_MODE):
+        if mode not in ('window', 'batch'):
+            raise ValueError(f"Unknown dedup mode: {mode}")
+        self.db = db
+        self.window_days = window_days
+        self.mode = mode
+        self.seen = {}
+
+    def __len__(self):
+        return len(self.seen)
+
+    def __contains__(self, url):
+        return url_digest(url) in self.seen
+
+    async def load(self):
+        if self.mode == 'batch':
+            self.seen = {}
+            logger.info("Batch dedup mode: candidate URLs are checked once per cycle")
+            return
+        hashes = await call_db(self.db.get_processed_url_hashes, self.window_days) or {}
+        now = time.monotonic()
+        self.seen = {digest: (*digests, now) for digest, digests in hashes.items()}
+        logger.info(f"Loaded {len(self.seen)} URLs processed in the last {self.window_days} days")
+
+    def add(self, article):
+        self.seen[url_digest(article['url'])] = (*content_digests(article), article['date'], time.monotonic())
+
+    def prune(self):
+        cutoff = time.monotonic() - self.window_days * 86400
+        stale = [digest for digest, (*_, seen_at) in self.seen.items() if seen_at < cutoff]
+        for digest in stale:
+            del self.seen[digest]
+
+    async def filter_new(self, articles):
+        """
+        Return the articles whose URL has not been processed yet or whose
+        content changed since, in order, and remember them as seen.
+        """
+        self.prune()
+        candidates = {}
+        for article in articles:
+            digest = url_digest(article['url'])
+            if digest not in candidates:
+                candidates[digest] = (article, content_digests(article))
+
+        # Anything missing locally may still be stored (older than the
+        # window, or never preloaded in batch mode)
+        unknown = [digest for digest in candidates if digest not in self.seen]
+        try:
+            stored = await call_db(self.db.get_existing_url_hashes, unknown)
+        except Exception:
+            # Same outcome as an unreachable database at startup: treat the
+            # URLs as new. The insert's ON CONFLICT still skips repeats under
+            # the same date, but a stored URL whose pubDate changed gets a
+            # second row
+            stored = {}
+
+        now = time.monotonic()
+        new_articles = []
+        for digest, (article, (content_hash, semantic_hash)) in candidates.items():
+            previous = self.seen.get(digest) or stored.get(digest)
+            if previous is not None:
+                # Write to the row already stored for this URL
+                article['date'] = previous[2]
+            self.seen[digest] = (content_hash, semantic_hash, article['date'], now)
+            if previous is None:
+                new_articles.append(article)
+            elif previous[0] != content_hash:
+                # Rows stored before digests existed have none; refreshing
+                # their text is cheap and backfills the digests
+                cosmetic = previous[0] is None or previous[1] == semantic_hash
+                article['change'] = 'cosmetic' if cosmetic else 'content'
+                new_articles.append(article)
+        return new_articles
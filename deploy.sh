@@ -21,6 +21,10 @@ source venv/bin/activate
 echo "Installing architecture-specific psycopg2-binary..."
 pip install --platform=manylinux2014_x86_64 --target=lambda_deployment --implementation cp --python-version 3.9 --only-binary=:all: --upgrade psycopg2-binary
 
+# asyncpg ships compiled extensions too (used when DB_DRIVER=asyncpg)
+echo "Installing architecture-specific asyncpg..."
+pip install --platform=manylinux2014_x86_64 --target=lambda_deployment --implementation cp --python-version 3.9 --only-binary=:all: --upgrade asyncpg
+
 # Install other dependencies
 echo "Installing other dependencies..."
 pip install aiohttp boto3 feedparser python-dotenv greenlet typing_extensions async_timeout --target lambda_deployment/
@@ -0,0 +1,246 @@
+import argparse
+import json
+import logging
+import os
+from collections import deque
+from datetime import datetime
+from psycopg2 import sql
+from database import Database
+from heatmap import REFRESH_OVERLAP
+from config import EXPORT_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+# (name, arrow type) of every exported column, in NEWS_SELECT order
+NEWS_COLUMNS = [
+    ('id', 'int32'), ('news_source', 'string'), ('title', 'string'),
+    ('description', 'string'), ('lon', 'float64'), ('lat', 'float64'),
+    ('type', 'string'), ('date', 'date32'), ('url', 'string'),
+    ('processed_at', 'timestamp'),
+]
+
+# Coordinates are split into lon/lat by the server. Descriptions may have
+# been moved to news_descriptions (DESCRIPTION_STORAGE=side)
+NEWS_SELECT = """
+SELECT n.id, n.news_source, n.title, COALESCE(n.description, d.description),
+    ST_X(n.coordinates::geometry), ST_Y(n.coordinates::geometry),
+    n.type, n.date, n.url, n.processed_at
+FROM {table} n LEFT JOIN news_descriptions d ON d.news_id = n.id
+"""
+
+# One JSON document per row, rendered by the server for NDJSON exports
+NEWS_JSON_SELECT = """
+SELECT json_build_object(
+    'id', n.id, 'news_source', n.news_source, 'title', n.title,
+    'description', COALESCE(n.description, d.description),
+    'lon', ST_X(n.coordinates::geometry), 'lat', ST_Y(n.coordinates::geometry),
+    'type', n.type, 'date', n.date, 'url', n.url, 'processed_at', n.processed_at
+)::text, n.processed_at, n.id
+FROM {table} n LEFT JOIN news_descriptions d ON d.news_id = n.id
+"""
+
+FORMATS = ('parquet', 'arrow', 'ndjson')
+
+def pyarrow_module():
+    # Optional dependency: only exports and the archive need it
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+        import pyarrow.fs
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("Exporting news requires pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def news_schema():
+    pa = pyarrow_module()
+    types = {
+        'int32': pa.int32(), 'string': pa.string(), 'float64': pa.float64(),
+        'date32': pa.date32(), 'timestamp': pa.timestamp('us'),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in NEWS_COLUMNS])
+
+
+def record_batches(cursor, schema, chunk_size):
+    """
+    Yield the rows of an executed (server-side) cursor as Arrow record
+    batches of up to chunk_size rows. Values are converted a column at a
+    time, so only one chunk is ever held in memory.
+    """
+    pa = pyarrow_module()
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        columns = zip(*rows)
+        yield pa.record_batch(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+            schema=schema
+        )
+
+
+def stream_news(conn, chunk_size=EXPORT_CHUNK_SIZE, table='news', where=None, params=(),
+                order_by=None, json_rows=False):
+    """
+    Run NEWS_SELECT (or NEWS_JSON_SELECT) over `table` through a named
+    cursor on `conn` and yield Arrow record batches (or lists of
+    (json text, processed_at, id) rows). The caller owns the transaction.
+    """
+    query = sql.SQL(NEWS_JSON_SELECT if json_rows else NEWS_SELECT).format(table=sql.Identifier(table))
+    if where:
+        query += sql.SQL(" WHERE " + where)
+    if order_by:
+        query += sql.SQL(" ORDER BY " + order_by)
+    with conn.cursor(name=f"stream_{table}") as cursor:
+        cursor.itersize = chunk_size
+        cursor.execute(query, params)
+        if json_rows:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        else:
+            yield from record_batches(cursor, news_schema(), chunk_size)
+
+
+class NewsExporter:
+    """
+    Streams news out for analytics as Parquet, Arrow IPC or NDJSON without
+    ever holding the table in memory. With `since`, only rows processed
+    after that processed_at watermark (less REFRESH_OVERLAP) are
+    exported, skipping the `exported_ids` (id, processed_at) pairs a
+    previous export already wrote; export() returns the new watermark and
+    the pairs to skip next time.
+    """
+
+    def __init__(self, db, chunk_size=EXPORT_CHUNK_SIZE):
+        self.db = db
+        self.chunk_size = chunk_size
+
+    def export(self, path, format='parquet', since=None, exported_ids=frozenset()):
+        """Write the export to `path`; returns (rows written, watermark, exported (id, processed_at) pairs)"""
+        if format not in FORMATS:
+            raise ValueError(f"Unknown export format: {format}")
+        where, params = (
+            ("n.processed_at > %s", (since - REFRESH_OVERLAP,)) if since is not None else (None, ())
+        )
+        stream = dict(
+            chunk_size=self.chunk_size, where=where, params=params,
+            order_by="n.processed_at, n.id", json_rows=format == 'ndjson'
+        )
+
+        # Written under a temporary name so readers never see a partial file
+        tmp_path = f"{path}.tmp"
+        rows, watermark = 0, since
+        # processed_at is the start of the inserting transaction, so a row
+        # can commit after a previous export moved the watermark past it:
+        # rescan REFRESH_OVERLAP before the watermark and skip the (id,
+        # processed_at) pairs exported last time. A row updated since has a
+        # new processed_at and is exported again.
+        # (processed_at, id) of the rows read within REFRESH_OVERLAP of the newest
+        recent = deque()
+        try:
+            with self.db.connection() as conn:
+                if format == 'ndjson':
+                    with open(tmp_path, 'w', encoding='utf-8') as f:
+                        for chunk in stream_news(conn, **stream):
+                            _track_recent(recent, [(processed_at, news_id) for _, processed_at, news_id in chunk])
+                            documents = [
+                                document for document, processed_at, news_id in chunk
+                                if (news_id, processed_at) not in exported_ids
+                            ]
+                            if documents:
+                                f.write('\n'.join(documents))
+                                f.write('\n')
+                            rows += len(documents)
+                else:
+                    pa = pyarrow_module()
+                    schema = news_schema()
+                    if format == 'parquet':
+                        writer = pa.parquet.ParquetWriter(tmp_path, schema, compression='zstd')
+                    else:
+                        writer = pa.ipc.new_file(tmp_path, schema)
+                    with writer:
+                        for batch in stream_news(conn, **stream):
+                            ids = batch.column('id').to_pylist()
+                            processed = batch.column('processed_at').to_pylist()
+                            _track_recent(recent, list(zip(processed, ids)))
+                            keep = [pair not in exported_ids for pair in zip(ids, processed)]
+                            if not all(keep):
+                                batch = batch.filter(pa.array(keep))
+                            if batch.num_rows:
+                                writer.write_batch(batch)
+                            rows += batch.num_rows
+                conn.commit()
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Error exporting news to {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if recent and (watermark is None or recent[-1][0] > watermark):
+            watermark = recent[-1][0]
+        logger.info(f"Exported {rows} articles to {path} (watermark {watermark})")
+        return rows, watermark, frozenset((news_id, processed_at) for processed_at, news_id in recent)
+
+
+def _track_recent(recent, rows):
+    """Append (processed_at, id) rows, read in processed_at order, and drop those outside the overlap"""
+    recent.extend(rows)
+    while recent and recent[0][0] <= recent[-1][0] - REFRESH_OVERLAP:
+        recent.popleft()
+
+
+def _read_watermark(path):
+    """
+    (watermark, exported (id, processed_at) pairs) stored by main(); plain
+    ISO timestamps and bare ids from older files are read as well, the ids
+    simply not being skipped
+    """
+    with open(path) as f:
+        text = f.read().strip()
+    try:
+        state = json.loads(text)
+    except ValueError:
+        return datetime.fromisoformat(text), frozenset()
+    exported = frozenset(
+        (entry[0], datetime.fromisoformat(entry[1]))
+        for entry in state['exported_ids'] if isinstance(entry, list)
+    )
+    return datetime.fromisoformat(state['watermark']), exported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream the news table to an analytics file")
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=FORMATS, default='parquet')
+    parser.add_argument('--since', type=datetime.fromisoformat,
+                        help="only rows processed after this timestamp")
+    parser.add_argument('--watermark-file',
+                        help="read --since from this file and store the new watermark in it")
+    args = parser.parse_args(argv)
+
+    since, exported_ids = args.since, frozenset()
+    if args.watermark_file and since is None and os.path.exists(args.watermark_file):
+        since, exported_ids = _read_watermark(args.watermark_file)
+    _, watermark, exported_ids = NewsExporter(Database()).export(
+        args.path, args.format, since, exported_ids
+    )
+    if args.watermark_file and watermark is not None:
+        with open(args.watermark_file, 'w') as f:
+            json.dump({
+                'watermark': watermark.isoformat(),
+                'exported_ids': [[news_id, processed_at.isoformat()] for news_id, processed_at in sorted(exported_ids)],
+            }, f)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    main()
@@ -1,9 +1,21 @@
-import feedparser
 import asyncio
+import functools
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 import aiohttp
-from config import RSS_FEEDS, POLLING_INTERVAL, MAX_RETRIES, RETRY_DELAY
+from database import call_db
+from dedup_index import DedupIndex
+from feed_reader import read_feed
+from feed_scheduler import FeedScheduler
+from host_limiter import HostLimiter
+from retry import RetryPolicy, CircuitBreaker
+from config import (
+    RSS_FEEDS, FEED_INCREMENTAL_PARSING, FEED_KNOWN_RUN,
+    FEED_PARSE_WORKERS, FEED_HOST_CONCURRENCY, FEED_MAX_CONNECTIONS
+)
 
 logger = logging.getLogger(__name__)
 
@@ -12,8 +24,24 @@ class FeedFetcher:
         # Store feed URLs and database handle
         self.feeds = RSS_FEEDS
         self.db = db
-        self.processed_urls = set()
+        self.dedup = DedupIndex(db)
+        self.scheduler = FeedScheduler(self.feeds)
         self.session = None
+        self.limiter = HostLimiter()
+        self.retry = RetryPolicy()
+        self.breaker = CircuitBreaker()
+        self.parse_pool = None
+        # feed_url -> URLs listed at its previous read, for the early stop
+        self.recent_urls = {}
+        # feed_url -> feed_state columns, loaded at startup and saved by
+        # save_state(); `dirty_feeds` are the ones changed since
+        self.feed_state = {}
+        self.dirty_feeds = set()
+        self.stats = {
+            'downloads': 0, 'not_modified': 0,
+            'bytes_downloaded': 0, 'bytes_saved': 0,
+            'parse_seconds': 0.0, 'parse_seconds_saved': 0.0,
+        }
 
         # Common headers to avoid 403 responses
         self.headers = {
@@ -24,41 +52,108 @@ class FeedFetcher:
             ),
             'Accept': 'application/rss+xml, application/xml;q=0.9, */*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Referer': ''  # will set dynamically
+            'Accept-Encoding': 'gzip, deflate'
         }
 
     async def initialize(self):
-        # Initialize HTTP session with default headers and persistent connector
-        connector = aiohttp.TCPConnector(limit=10, force_close=False)
+        # Initialize HTTP session with default headers and persistent connector;
+        # HostLimiter throttles each host, the connector only caps the total
+        connector = aiohttp.TCPConnector(
+            limit=FEED_MAX_CONNECTIONS, limit_per_host=FEED_HOST_CONCURRENCY, force_close=False
+        )
         self.session = aiohttp.ClientSession(connector=connector, headers=self.headers)
-        self.processed_urls = self.db.get_processed_urls() or set()
-        logger.info(f"Initialized feed fetcher with {len(self.processed_urls)} existing articles")
+        self.feed_state = await call_db(self.db.get_feed_states) or {}
+        self.scheduler.load(self.feed_state)
+        await self.dedup.load()
+        logger.info(f"Initialized feed fetcher with {len(self.dedup)} existing articles")
 
     async def close(self):
         if self.session:
             await self.session.close()
+        if self.parse_pool:
+            self.parse_pool.shutdown(wait=False, cancel_futures=True)
+            self.parse_pool = None
+
+    async def save_state(self):
+        """
+        Persist the feed state changed since the last save. Call it once the
+        fetched articles have been processed: a feed answering 304 Not
+        Modified is not parsed again, so saving its validators earlier could
+        lose articles from a run that failed midway.
+        """
+        dirty = {feed_url: self.feed_state[feed_url] for feed_url in self.dirty_feeds}
+        try:
+            await call_db(self.db.save_feed_states, dirty)
+            self.dirty_feeds.clear()
+        except Exception as e:
+            logger.error(f"Error saving state of {len(dirty)} feeds: {e}")
+
+    def _conditional_headers(self, feed_url):
+        state = self.feed_state.get(feed_url) or {}
+        headers = {}
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+        return headers
 
     async def fetch_feed(self, feed_url):
+        """
+        Download a feed with a conditional GET. Returns (raw bytes, the
+        response's validators) on a 200, or None on a 304 or failure. The
+        validators are only stored once the feed has been read, so a feed
+        that fails to parse is downloaded in full again next time.
+        """
         # Validate URL format
         if not feed_url.startswith('http'):
             logger.error(f"Invalid feed URL: {feed_url}")
             return None
 
+        state = self.feed_state.setdefault(feed_url, {})
+        if not self.breaker.allow(state):
+            logger.info(f"Skipping {feed_url}: circuit breaker open until {state['open_until']}")
+            return None
+
         last_error = None
-        for attempt in range(1, MAX_RETRIES + 1):
+        for attempt in range(1, self.retry.attempts + 1):
+            retry_after = None
             try:
-                # Update Referer dynamically to feed's domain
-                self.session.headers['Referer'] = feed_url.rsplit('/', 1)[0]
-
-                async with self.session.get(feed_url, timeout=30) as response:
+                # Per-request headers: the session's are shared by every feed
+                headers = {'Referer': feed_url.rsplit('/', 1)[0], **self._conditional_headers(feed_url)}
+                async with self.limiter.slot(feed_url), \
+                        self.session.get(feed_url, timeout=30, headers=headers) as response:
                     status = response.status
+                    if status in (200, 304):
+                        # Only an answered poll counts as a check; failed
+                        # ones leave checked_at (and the schedule's rate) alone
+                        state['checked_at'] = datetime.utcnow()
+                        self.dirty_feeds.add(feed_url)
+                        self.limiter.reward(feed_url)
+                        self.breaker.record_success(state)
                     if status == 200:
-                        # Read raw bytes and let feedparser handle encoding
+                        # Raw bytes; the parsers handle the encoding
                         raw = await response.read()
-                        return feedparser.parse(raw)
-                    elif status == 403:
-                        logger.warning(f"403 Forbidden for {feed_url} (attempt {attempt})")
+                        state.update(body_bytes=len(raw), updated_at=state['checked_at'])
+                        self.stats['downloads'] += 1
+                        self.stats['bytes_downloaded'] += len(raw)
+                        validators = {
+                            'etag': response.headers.get('ETag'),
+                            'last_modified': response.headers.get('Last-Modified')
+                        }
+                        return raw, validators
+                    elif status == 304:
+                        # Nothing new since the stored validators; every entry
+                        # was already handled when they were saved
+                        self.stats['not_modified'] += 1
+                        self.stats['bytes_saved'] += state.get('body_bytes') or 0
+                        self.stats['parse_seconds_saved'] += state.get('parse_seconds') or 0.0
+                        logger.info(f"Feed not modified: {feed_url}")
+                        return None
+                    retry_after = self.retry.retry_after(response.headers)
+                    if status in (403, 429):
+                        # The host is throttling us: slow down all its feeds
+                        logger.warning(f"{status} from {feed_url} (attempt {attempt})")
+                        self.limiter.penalize(feed_url)
                     else:
                         logger.warning(f"Unexpected status {status} fetching {feed_url} (attempt {attempt})")
             except asyncio.TimeoutError:
@@ -70,103 +165,140 @@ class FeedFetcher:
                 logger.exception(f"Unhandled error fetching {feed_url} on attempt {attempt}: {e}")
                 last_error = e
 
-            if attempt < MAX_RETRIES:
-                await asyncio.sleep(RETRY_DELAY)
+            if not await self.retry.wait(attempt, retry_after):
+                break
 
-        logger.error(f"Failed to fetch feed after {MAX_RETRIES} attempts: {feed_url}. Last error: {last_error}")
+        logger.error(f"Failed to fetch feed after {attempt} attempts: {feed_url}. Last error: {last_error}")
+        if self.breaker.record_failure(state):
+            logger.warning(
+                f"Circuit breaker open for {feed_url} after {state['failure_count']} failed polls, "
+                f"skipping it until {state['open_until']}"
+            )
+        self.dirty_feeds.add(feed_url)
         return None
 
-    async def fetch_all_feeds(self):
-        tasks = [self.fetch_feed(feed) for feed in self.feeds]
+    async def fetch_due_feeds(self, horizon=0):
+        """Fetch only the feeds whose scheduled poll is due within `horizon` seconds"""
+        due = self.scheduler.due(horizon=horizon)
+        if not due:
+            return []
+        return await self.fetch_feeds(due)
+
+    async def fetch_feeds(self, feed_urls):
+        previous_polls = {
+            feed_url: (self.feed_state.get(feed_url) or {}).get('checked_at') for feed_url in feed_urls
+        }
+        tasks = [self._fetch_and_read(feed) for feed in feed_urls]
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
-        new_articles = []
-        for idx, result in enumerate(results):
-            feed_url = self.feeds[idx]
+        candidates = []
+        feed_candidates = {}
+        for feed_url, result in zip(feed_urls, results):
             if isinstance(result, Exception):
                 logger.error(f"Exception fetching feed {feed_url}: {result}")
                 continue
-            if not result or not hasattr(result, 'entries'):
-                continue
+            # Polled, possibly answering 304 Not Modified
+            feed_candidates[feed_url] = result or []
+            candidates.extend(feed_candidates[feed_url])
 
-            source_name = getattr(result.feed, 'title', feed_url)
-            for entry in result.entries:
-                article = self._parse_entry(entry, source_name)
-                if article and article['url'] not in self.processed_urls:
-                    new_articles.append(article)
-                    self.processed_urls.add(article['url'])
+        new_articles = await self.dedup.filter_new(candidates)
+        new_ids = {id(article) for article in new_articles}
+        for feed_url in feed_urls:
+            state = self.feed_state.setdefault(feed_url, {})
+            # fetch_feed stamps checked_at only on a 200 or 304, which tells
+            # a 304 apart from a fetch that failed (or was skipped by the
+            # circuit breaker); failures are no observation for the schedule
+            polled = feed_url in feed_candidates and state.get('checked_at') != previous_polls[feed_url]
+            new_entries = sum(1 for article in feed_candidates.get(feed_url, ()) if id(article) in new_ids)
+            self.scheduler.record(
+                feed_url, state, new_entries if polled else None, previous_polls[feed_url]
+            )
+            self.dirty_feeds.add(feed_url)
 
-        logger.info(f"Fetched {len(new_articles)} new articles from {len(self.feeds)} feeds")
+        updated = sum(1 for article in new_articles if 'change' in article)
+        logger.info(
+            f"Fetched {len(new_articles) - updated} new and {updated} updated articles "
+            f"from {len(feed_urls)} feeds"
+        )
+        stats = self.stats
+        logger.info(
+            f"Feed fetch totals: {stats['downloads']} downloads ({stats['bytes_downloaded']} bytes, "
+            f"{stats['parse_seconds']:.3f}s parsing), {stats['not_modified']} not modified "
+            f"(saved {stats['bytes_saved']} bytes, {stats['parse_seconds_saved']:.3f}s parsing)"
+        )
         return new_articles
 
-    def _parse_entry(self, entry, source_name):
-        try:
-            url = getattr(entry, 'link', None)
-            if not url:
-                return None
-
-            # Parse publication date
-            published = None
-            for field in ('published_parsed', 'updated_parsed'):
-                struct_time = getattr(entry, field, None)
-                if struct_time:
-                    published = datetime(*struct_time[:6]).date()
-                    break
-
-            # Fallback to string fields
-            if not published:
-                for field in ('published', 'pubDate', 'updated'):
-                    date_str = getattr(entry, field, None)
-                    if date_str:
-                        try:
-                            published = datetime.fromisoformat(date_str).date()
-                            break
-                        except Exception:
-                            continue
-
-            if not published:
-                published = datetime.utcnow().date()
-
-            title = getattr(entry, 'title', None)
-            description = None
-            for desc in ('description', 'summary', 'content'):
-                val = getattr(entry, desc, None)
-                if val:
-                    description = val
-                    break
-
-            # Normalize content lists
-            if isinstance(description, list):
-                description = ''.join(
-                    item.get('value', '') for item in description if isinstance(item, dict)
-                )
-
-            if not title or not description:
-                return None
-
-            return {
-                'news_source': source_name,
-                'title': title,
-                'description': description,
-                'url': url,
-                'date': published
-            }
-        except Exception as e:
-            logger.error(f"Error parsing RSS entry: {e}")
+    async def _fetch_and_read(self, feed_url):
+        fetched = await self.fetch_feed(feed_url)
+        if not fetched:
             return None
+        raw, validators = fetched
+        articles = await self._read_feed(feed_url, raw)
+        self.feed_state[feed_url].update(validators)
+        return articles
+
+    def _parse_executor(self):
+        """
+        Process pool for parsing feeds, or None for the default thread pool
+        when FEED_PARSE_WORKERS is 0 (the Lambda default: Lambda has no
+        /dev/shm, which multiprocessing needs).
+        """
+        if FEED_PARSE_WORKERS > 0 and self.parse_pool is None:
+            # spawn: forking a process that runs an event loop and holds
+            # database connections is not safe
+            self.parse_pool = ProcessPoolExecutor(
+                max_workers=FEED_PARSE_WORKERS, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self.parse_pool
+
+    async def _read_feed(self, feed_url, raw):
+        """
+        Candidate articles of a downloaded feed, parsed off the event loop
+        by feed_reader.read_feed. The known URLs for its early stop are the
+        ones this feed listed at its previous read.
+        """
+        state = self.feed_state.setdefault(feed_url, {})
+        parse = functools.partial(
+            read_feed, raw, state.get('high_water_mark'), self.recent_urls.get(feed_url, frozenset()),
+            FEED_INCREMENTAL_PARSING, FEED_KNOWN_RUN
+        )
+        loop = asyncio.get_running_loop()
+        try:
+            title, rows, newest, parse_seconds = await loop.run_in_executor(self._parse_executor(), parse)
+        except BrokenProcessPool:
+            logger.error(f"Feed parser pool broke while parsing {feed_url}, parsing in a thread")
+            self.parse_pool = None
+            title, rows, newest, parse_seconds = await loop.run_in_executor(None, parse)
+
+        state['high_water_mark'] = newest
+        state['parse_seconds'] = parse_seconds
+        self.stats['parse_seconds'] += parse_seconds
+        if rows:
+            self.recent_urls[feed_url] = frozenset(url for url, *_ in rows)
+        source_name = title or feed_url
+        return [
+            {'news_source': source_name, 'title': entry_title, 'description': description,
+             'url': url, 'date': published}
+            for url, entry_title, description, published in rows
+        ]
 
     async def poll_feeds_continuously(self, article_queue):
         try:
             await self.initialize()
             while True:
                 try:
-                    new_articles = await self.fetch_all_feeds()
+                    new_articles = await self.fetch_due_feeds()
                     for article in new_articles:
                         await article_queue.put(article)
                     logger.info(f"Queued {len(new_articles)} new articles")
+                    # A restart starts from the saved validators and
+                    # high-water marks, so they may only be saved once the
+                    # workers have stored (or spooled) this cycle's articles
+                    await article_queue.join()
+                    await self.save_state()
                 except Exception as e:
                     logger.error(f"Polling cycle error: {e}")
                 finally:
-                    await asyncio.sleep(POLLING_INTERVAL)
+                    await asyncio.sleep(self.scheduler.seconds_until_next())
         finally:
             await self.close()
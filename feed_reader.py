@@ -0,0 +1,228 @@
+import io
+import logging
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from types import SimpleNamespace
+import feedparser
+# feedparser's own cleanup, so both readers give an entry the same text
+# (and content_hash). These are private to feedparser 6, which
+# requirements.txt pins
+from feedparser.mixin import _FeedParserMixin
+from feedparser.sanitizer import _sanitize_html
+
+logger = logging.getLogger(__name__)
+
+ENTRY_TAGS = ('item', 'entry')
+ROOT_TAGS = ('rss', 'RDF', 'feed')
+ATOM_NAMESPACE = '{http://www.w3.org/2005/Atom}'
+# RSS elements feedparser always treats as HTML; other RSS text only when
+# it looks like HTML
+RSS_HTML_ELEMENTS = ('description', 'encoded', 'content')
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _struct_time(value, rfc822):
+    """UTC struct_time of an RSS (RFC 822) or Atom/Dublin Core (ISO 8601) date, like feedparser"""
+    try:
+        if rfc822:
+            parsed = parsedate_to_datetime(value)
+        else:
+            parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).timetuple()
+
+
+def _clean(child, name, text):
+    """Sanitize markup in an element's text the way feedparser does"""
+    if child.tag.startswith(ATOM_NAMESPACE):
+        is_html = child.get('type') in ('html', 'xhtml', 'text/html')
+    else:
+        is_html = name in RSS_HTML_ELEMENTS or _FeedParserMixin.looks_like_html(text)
+    return _sanitize_html(text, 'utf-8', 'text/html') if is_html and text else text
+
+
+def _entry(element):
+    """feedparser-like entry (attribute access) from an RSS item or Atom entry"""
+    fields = {}
+    permalink = None
+    for child in element:
+        name, text = _local_name(child.tag), (child.text or '').strip()
+        if name == 'link':
+            # Atom links live in href; prefer the alternate one
+            href = child.get('href')
+            if href and child.get('rel', 'alternate') == 'alternate':
+                fields['link'] = href
+            elif text:
+                fields.setdefault('link', text)
+        elif name == 'pubDate':
+            fields['published'] = text
+            fields['published_parsed'] = _struct_time(text, rfc822=True)
+        elif name in ('published', 'date'):
+            fields['published'] = text
+            fields['published_parsed'] = _struct_time(text, rfc822=False)
+        elif name == 'updated':
+            fields['updated'] = text
+            fields['updated_parsed'] = _struct_time(text, rfc822=False)
+        elif name == 'guid':
+            # Like feedparser, a permalink guid stands in for a missing link
+            if text and child.get('isPermaLink', 'true').lower() == 'true':
+                permalink = text
+        elif name in ('title', 'description', 'summary'):
+            fields[name] = _clean(child, name, text)
+        elif name in ('content', 'encoded'):
+            fields['content'] = _clean(child, name, text)
+    if 'link' not in fields and permalink:
+        fields['link'] = permalink
+    return SimpleNamespace(**fields)
+
+
+class FeedReader:
+    """
+    Lazily reads the entries of an RSS 1.0/2.0 or Atom document with
+    iterparse, so a caller that stops early never parses (or keeps in
+    memory) the rest of the feed. Entries support the attribute access
+    parse_entry uses on feedparser entries; `title` is the
+    feed's title once it has been read. XML that iterparse rejects, or that
+    is not RSS/Atom, falls back to feedparser for the remaining entries.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.title = None
+
+    def __iter__(self):
+        yielded = 0
+        try:
+            root, in_entry = None, 0
+            for event, element in ET.iterparse(io.BytesIO(self.raw), events=('start', 'end')):
+                name = _local_name(element.tag)
+                if root is None:
+                    root = name
+                    if root not in ROOT_TAGS:
+                        raise ET.ParseError(f"unexpected root element {root}")
+                if event == 'start':
+                    if name in ENTRY_TAGS:
+                        in_entry += 1
+                    continue
+                if name in ENTRY_TAGS:
+                    in_entry -= 1
+                    yield _entry(element)
+                    yielded += 1
+                    element.clear()
+                elif name == 'title' and not in_entry and self.title is None:
+                    self.title = (element.text or '').strip() or None
+            return
+        except ET.ParseError as e:
+            logger.info(f"Incremental parser failed after {yielded} entries ({e}), using feedparser")
+
+        parsed = feedparser.parse(self.raw)
+        if self.title is None:
+            self.title = getattr(parsed.feed, 'title', None)
+        yield from parsed.entries[yielded:]
+
+
+def entry_time(entry):
+    """Publication (or update) time of an entry as a naive UTC datetime"""
+    for field in ('published_parsed', 'updated_parsed'):
+        struct_time = getattr(entry, field, None)
+        if struct_time:
+            return datetime(*struct_time[:6])
+    return None
+
+
+def parse_entry(entry):
+    """Compact (url, title, description, date) article tuple of an entry, or None"""
+    try:
+        url = getattr(entry, 'link', None)
+        if not url:
+            return None
+
+        # Parse publication date
+        published = None
+        for field in ('published_parsed', 'updated_parsed'):
+            struct_time = getattr(entry, field, None)
+            if struct_time:
+                published = datetime(*struct_time[:6]).date()
+                break
+
+        # Fallback to string fields
+        if not published:
+            for field in ('published', 'pubDate', 'updated'):
+                date_str = getattr(entry, field, None)
+                if date_str:
+                    try:
+                        published = datetime.fromisoformat(date_str).date()
+                        break
+                    except Exception:
+                        continue
+
+        if not published:
+            published = datetime.utcnow().date()
+
+        title = getattr(entry, 'title', None)
+        description = None
+        for desc in ('description', 'summary', 'content'):
+            val = getattr(entry, desc, None)
+            if val:
+                description = val
+                break
+
+        # Normalize content lists
+        if isinstance(description, list):
+            description = ''.join(
+                item.get('value', '') for item in description if isinstance(item, dict)
+            )
+
+        if not title or not description:
+            return None
+
+        return (url, title, description, published)
+    except Exception as e:
+        logger.error(f"Error parsing RSS entry: {e}")
+        return None
+
+
+def read_feed(raw, high_water_mark=None, known_urls=(), incremental=True, known_run=5):
+    """
+    Parse a downloaded feed into (feed title, article tuples, newest entry
+    time, CPU seconds spent). A plain top-level function of picklable
+    arguments so it can run in a worker process.
+
+    In incremental mode entries are parsed lazily, newest first, and reading
+    stops at the first one published before `high_water_mark` or after
+    `known_run` consecutive URLs from `known_urls`, so usually only the top
+    of the feed is parsed. Edits to entries below that point are not
+    noticed; incremental=False parses every entry with feedparser.
+    """
+    started = time.thread_time()
+    if incremental:
+        entries = reader = FeedReader(raw)
+    else:
+        parsed = feedparser.parse(raw)
+        entries, reader = parsed.entries, parsed.feed
+
+    articles = []
+    newest = high_water_mark
+    run = 0
+    for entry in entries:
+        published = entry_time(entry)
+        if incremental and high_water_mark and published and published < high_water_mark:
+            break
+        if published and (newest is None or published > newest):
+            newest = published
+        article = parse_entry(entry)
+        if not article:
+            continue
+        articles.append(article)
+        run = run + 1 if article[0] in known_urls else 0
+        if incremental and run >= known_run:
+            break
+    return getattr(reader, 'title', None), articles, newest, time.thread_time() - started
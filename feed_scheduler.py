@@ -0,0 +1,99 @@
+import heapq
+import logging
+import random
+from datetime import datetime, timedelta
+from config import (
+    POLLING_INTERVAL, FEED_MIN_INTERVAL, FEED_MAX_INTERVAL, FEED_TARGET_NEW_PER_POLL,
+    FEED_SCHEDULE_JITTER
+)
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest poll in the moving averages
+SMOOTHING = 0.3
+
+
+class FeedScheduler:
+    """
+    Decides when each feed is polled next. Per feed it keeps an
+    exponentially weighted publish rate (new entries per hour) in its
+    feed_state dict. The next poll is due after the time the feed needs to
+    publish `target_new` entries at that rate, bounded by [min_interval,
+    max_interval] and jittered so feeds on one host drift apart. Feeds that
+    keep answering with nothing new back off towards max_interval as their
+    rate decays; feeds whose circuit breaker is open are due when it closes.
+    """
+
+    def __init__(self, feeds, min_interval=FEED_MIN_INTERVAL, max_interval=FEED_MAX_INTERVAL,
+                 target_new=FEED_TARGET_NEW_PER_POLL, jitter=FEED_SCHEDULE_JITTER):
+        self.feeds = list(feeds)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_new = target_new
+        self.jitter = jitter
+        self.queue = []
+
+    def load(self, feed_state):
+        """Queue every feed at its stored due time; feeds never polled are due now"""
+        now = datetime.utcnow()
+        self.queue = [
+            ((feed_state.get(feed_url) or {}).get('next_due_at') or now, feed_url)
+            for feed_url in self.feeds
+        ]
+        heapq.heapify(self.queue)
+
+    def due(self, now=None, horizon=0):
+        """
+        Remove and return the feeds whose poll is due, or falls due within
+        `horizon` seconds. A caller that only runs every N seconds passes N,
+        so a feed due just after this run is not left waiting for the next.
+        """
+        until = (now or datetime.utcnow()) + timedelta(seconds=horizon)
+        feeds = []
+        while self.queue and self.queue[0][0] <= until:
+            feeds.append(heapq.heappop(self.queue)[1])
+        return feeds
+
+    def seconds_until_next(self, now=None):
+        if not self.queue:
+            return self.max_interval
+        now = now or datetime.utcnow()
+        return max((self.queue[0][0] - now).total_seconds(), 0)
+
+    def _interval(self, state):
+        rate = state.get('entries_per_hour')
+        if rate is None:
+            interval = state.get('poll_interval') or POLLING_INTERVAL
+        elif rate <= 0:
+            interval = self.max_interval
+        else:
+            interval = self.target_new / rate * 3600
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def record(self, feed_url, state, new_entries, since, now=None):
+        """
+        Fold one poll into the feed's state and queue its next poll.
+        `new_entries` is None when the poll failed (no observation) and
+        `since` is the previous poll time (None on the first poll).
+        """
+        now = now or datetime.utcnow()
+        if new_entries is not None and since is not None:
+            hours = max((now - since).total_seconds() / 3600, 1e-3)
+            observed = new_entries / hours
+            rate = state.get('entries_per_hour')
+            state['entries_per_hour'] = observed if rate is None else \
+                SMOOTHING * observed + (1 - SMOOTHING) * rate
+
+        interval = self._interval(state)
+        state['poll_interval'] = interval
+        if state.get('open_until') and state['open_until'] > now:
+            # The circuit breaker decides when a failing feed is tried again
+            state['next_due_at'] = state['open_until']
+        else:
+            interval *= random.uniform(1 - self.jitter, 1 + self.jitter)
+            state['next_due_at'] = now + timedelta(seconds=interval)
+        heapq.heappush(self.queue, (state['next_due_at'], feed_url))
+        logger.debug(
+            f"Next poll of {feed_url} at {state['next_due_at']} "
+            f"({state.get('entries_per_hour') or 0:.2f} new/h)"
+        )
@@ -1,8 +1,8 @@
 import aiohttp
-import asyncio
 import logging
 from urllib.parse import quote
-from config import MAPBOX_ACCESS_TOKEN, MAX_RETRIES, RETRY_DELAY
+from config import MAPBOX_ACCESS_TOKEN
+from retry import RetryPolicy
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +10,7 @@ class Geocoder:
     def __init__(self):
         self.access_token = MAPBOX_ACCESS_TOKEN
         self.session = None
+        self.retry = RetryPolicy()
 
     async def initialize(self):
         self.session = aiohttp.ClientSession()
@@ -24,7 +25,8 @@ class Geocoder:
 
         location = article['location']
 
-        for attempt in range(MAX_RETRIES):
+        for attempt in range(1, self.retry.attempts + 1):
+            retry_after = None
             try:
                 encoded_location = quote(location)
                 url = f"https://api.mapbox.com/geocoding/v5/mapbox.places/{encoded_location}.json?access_token={self.access_token}&country=mx&limit=1"
@@ -41,13 +43,16 @@ class Geocoder:
                         else:
                             logger.warning(f"No geocoding results for location: {location}")
                             return None
-                    else:
-                        logger.warning(f"Mapbox API error: {response.status}")
+                    logger.warning(f"Mapbox API error: {response.status}")
+                    # Only rate limiting and server errors are worth retrying
+                    if response.status != 429 and response.status < 500:
+                        return None
+                    retry_after = self.retry.retry_after(response.headers)
             except Exception as e:
                 logger.error(f"Error geocoding location {location}: {e}")
 
-            if attempt < MAX_RETRIES - 1:
-                await asyncio.sleep(RETRY_DELAY)
+            if not await self.retry.wait(attempt, retry_after):
+                break
 
-        logger.error(f"Failed to geocode location after {MAX_RETRIES} attempts: {location}")
+        logger.error(f"Failed to geocode location after {attempt} attempts: {location}")
         return None
@@ -0,0 +1,146 @@
+import logging
+import math
+from datetime import timedelta
+from psycopg2.extras import RealDictCursor
+from config import HEATMAP_ZOOM_LEVELS
+
+logger = logging.getLogger(__name__)
+
+# Web mercator is undefined at the poles; clamp like every slippy map does
+MAX_LATITUDE = 85.0511287798
+
+# Rows committed by transactions that started before the last refresh can
+# carry an older processed_at, so every refresh rescans a little overlap.
+# Exports and tile invalidation poll processed_at the same way and share it
+REFRESH_OVERLAP = timedelta(minutes=10)
+
+HEATMAP_LOCK_ID = 7268054
+
+
+def lonlat_to_tile(lon, lat, zoom):
+    """Web mercator (slippy map) tile containing a point"""
+    n = 2 ** zoom
+    lat = max(min(lat, MAX_LATITUDE), -MAX_LATITUDE)
+    lat_rad = math.radians(lat)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.log(math.tan(lat_rad) + 1.0 / math.cos(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_to_lonlat(x, y, zoom):
+    """North-west corner of a web mercator tile"""
+    n = 2 ** zoom
+    lon = x / n * 360.0 - 180.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    return lon, lat
+
+
+# SQL counterpart of lonlat_to_tile over news.coordinates and zoom level z.zoom
+CELL_X_SQL = """LEAST(GREATEST(
+    floor((ST_X(n.coordinates::geometry) + 180.0) / 360.0 * power(2, z.zoom))::int,
+    0), power(2, z.zoom)::int - 1)"""
+CELL_Y_SQL = f"""LEAST(GREATEST(
+    floor((1.0 - ln(tan(radians(LEAST(GREATEST(ST_Y(n.coordinates::geometry), -{MAX_LATITUDE}), {MAX_LATITUDE})))
+        + 1.0 / cos(radians(LEAST(GREATEST(ST_Y(n.coordinates::geometry), -{MAX_LATITUDE}), {MAX_LATITUDE}))))
+        / pi()) / 2.0 * power(2, z.zoom))::int,
+    0), power(2, z.zoom)::int - 1)"""
+
+
+class HeatmapAggregator:
+    """
+    Maintains news_heatmap, a rollup of article counts per (zoom, tile cell,
+    type, day), so heatmap requests read pre-aggregated rows instead of
+    clustering raw news rows. refresh() is the batch step run after each ETL
+    cycle: it rebuilds only the days that received articles since the last
+    refresh.
+    """
+
+    def __init__(self, db, zoom_levels=HEATMAP_ZOOM_LEVELS):
+        self.db = db
+        self.zoom_levels = sorted(zoom_levels)
+
+    def refresh(self, full=False):
+        try:
+            with self.db.connection() as conn:
+                with conn.cursor() as cursor:
+                    # Concurrent refreshes would delete each other's days
+                    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (HEATMAP_LOCK_ID,))
+                    cursor.execute("SELECT refreshed_until FROM news_heatmap_state")
+                    row = cursor.fetchone()
+                    if full or not row:
+                        cursor.execute("SELECT DISTINCT date FROM news")
+                    else:
+                        cursor.execute(
+                            "SELECT DISTINCT date FROM news WHERE processed_at > %s",
+                            (row[0] - REFRESH_OVERLAP,)
+                        )
+                    days = [day for (day,) in cursor.fetchall()]
+
+                    if days:
+                        cursor.execute("DELETE FROM news_heatmap WHERE date = ANY(%s)", (days,))
+                        cursor.execute(f"""
+                        INSERT INTO news_heatmap (zoom, date, type, cell_x, cell_y, count)
+                        SELECT z.zoom, n.date, n.type, {CELL_X_SQL}, {CELL_Y_SQL}, count(*)
+                        FROM news n
+                        CROSS JOIN unnest(%s::smallint[]) AS z(zoom)
+                        WHERE n.date = ANY(%s) AND n.coordinates IS NOT NULL AND n.type IS NOT NULL
+                        GROUP BY 1, 2, 3, 4, 5
+                        """, (self.zoom_levels, days))
+
+                    cursor.execute("""
+                    INSERT INTO news_heatmap_state (id, refreshed_until) VALUES (TRUE, LOCALTIMESTAMP)
+                    ON CONFLICT (id) DO UPDATE SET refreshed_until = EXCLUDED.refreshed_until
+                    """)
+                conn.commit()
+            logger.info(f"Refreshed heatmap rollup for {len(days)} days")
+            return len(days)
+        except Exception as e:
+            logger.error(f"Error refreshing heatmap rollup: {e}")
+            raise
+
+    def zoom_level_for(self, zoom):
+        """Finest maintained zoom level not finer than the requested one"""
+        return max((z for z in self.zoom_levels if z <= zoom), default=self.zoom_levels[0])
+
+    def cells(self, zoom, bbox=None, types=None, start_date=None, end_date=None):
+        """
+        Heatmap cells for a map view as dicts with the cell's centre lon/lat
+        and the number of articles, summed over the matching types and days.
+        """
+        level = self.zoom_level_for(zoom)
+        clauses, params = ["zoom = %s"], [level]
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            min_x, max_y = lonlat_to_tile(min_lon, min_lat, level)
+            max_x, min_y = lonlat_to_tile(max_lon, max_lat, level)
+            clauses.append("cell_x BETWEEN %s AND %s AND cell_y BETWEEN %s AND %s")
+            params.extend([min_x, max_x, min_y, max_y])
+        if types:
+            clauses.append("type = ANY(%s)")
+            params.append(list(types))
+        if start_date is not None:
+            clauses.append("date >= %s")
+            params.append(start_date)
+        if end_date is not None:
+            clauses.append("date <= %s")
+            params.append(end_date)
+
+        try:
+            with self.db.connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    cursor.execute(f"""
+                    SELECT cell_x, cell_y, sum(count)::int AS count
+                    FROM news_heatmap
+                    WHERE {" AND ".join(clauses)}
+                    GROUP BY cell_x, cell_y
+                    """, params)
+                    rows = cursor.fetchall()
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error querying heatmap: {e}")
+            raise
+
+        for row in rows:
+            row['zoom'] = level
+            row['lon'], row['lat'] = tile_to_lonlat(row['cell_x'] + 0.5, row['cell_y'] + 0.5, level)
+        return rows
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+from config import FEED_HOST_CONCURRENCY, FEED_HOST_RATE, FEED_HOST_BURST
+
+logger = logging.getLogger(__name__)
+
+# A throttled host's rate never drops below this share of the configured one
+MIN_RATE_FACTOR = 1 / 16
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average and bursts of up to `burst`"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens are handed out in order
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostLimiter:
+    """
+    Per-host throttle for outgoing requests: at most `concurrency` requests
+    in flight and a token bucket of `rate` requests per second (bursts of
+    `burst`) per host name. A host answering 403/429 gets its rate halved
+    (down to MIN_RATE_FACTOR of the configured rate). Every success
+    restores 10% of the configured rate, so a host that throttles us is
+    slowed down instead of hit with a retry storm.
+    """
+
+    def __init__(self, concurrency=FEED_HOST_CONCURRENCY, rate=FEED_HOST_RATE, burst=FEED_HOST_BURST):
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.semaphores = {}
+        self.buckets = {}
+
+    @staticmethod
+    def host(url):
+        return urlsplit(url).hostname or url
+
+    def _bucket(self, host):
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate, self.burst)
+        return self.buckets[host]
+
+    @asynccontextmanager
+    async def slot(self, url):
+        """Wait for a concurrency slot and a token of the URL's host"""
+        host = self.host(url)
+        semaphore = self.semaphores.setdefault(host, asyncio.Semaphore(self.concurrency))
+        async with semaphore:
+            await self._bucket(host).acquire()
+            yield
+
+    def penalize(self, url):
+        bucket = self._bucket(self.host(url))
+        bucket.rate = max(bucket.rate / 2, self.rate * MIN_RATE_FACTOR)
+        # Drop any saved-up burst so the next request waits a full interval
+        bucket.tokens = min(bucket.tokens, 0)
+        logger.warning(f"Throttling {self.host(url)} to {bucket.rate:.2f} requests/s")
+
+    def reward(self, url):
+        bucket = self._bucket(self.host(url))
+        bucket.rate = min(bucket.rate + self.rate / 10, self.rate)
@@ -223,15 +223,18 @@ async def lambda_main():
 
     try:
         # Import database modules here to make sure environment variables are set first
-        from database import Database
+        from database import create_database, call_db, Database
         from feed_fetcher import FeedFetcher
         from article_processor import ArticleProcessor
         from geocoder import Geocoder
+        from article_writer import ArticleWriter
+        from heatmap import HeatmapAggregator
+        from config import DB_DRIVER, LAMBDA_SCHEDULE_INTERVAL
 
         # Initialize database
         logger.info("Initializing database connection")
-        db = Database()
-        db.initialize_db()
+        db = create_database()
+        await call_db(db.initialize_db)
         logger.info("Database connection successful")
 
         article_queue = asyncio.Queue()
@@ -239,18 +242,25 @@ async def lambda_main():
         feed_fetcher = FeedFetcher(db)
         article_processor = ArticleProcessor()
         geocoder = Geocoder()
+        writer = ArticleWriter(db)
+        # Maintenance queries always go through psycopg2, whatever DB_DRIVER is
+        heatmap = HeatmapAggregator(Database())
 
         await geocoder.initialize()
         logger.info("Geocoder initialized")
 
+        # Articles left over from a previous run whose database writes failed
+        await writer.replay_spool()
+
         try:
             # Initialize the feed fetcher
             await feed_fetcher.initialize()
             logger.info("Feed fetcher initialized")
 
-            # Instead of continuous polling, fetch once
+            # Instead of continuous polling, fetch the feeds that are due once,
+            # including those falling due before the next scheduled invocation
             logger.info("Fetching RSS feeds")
-            new_articles = await feed_fetcher.fetch_all_feeds()
+            new_articles = await feed_fetcher.fetch_due_feeds(horizon=LAMBDA_SCHEDULE_INTERVAL)
             logger.info(f"Fetched {len(new_articles)} new articles")
 
             # Queue articles for processing
@@ -263,7 +273,7 @@ async def lambda_main():
             num_workers = 3
             for i in range(num_workers):
                 worker_task = asyncio.create_task(
-                    article_processor.process_articles(article_queue, geocoder, db)
+                    article_processor.process_articles(article_queue, geocoder, db, writer)
                 )
                 worker_tasks.append(worker_task)
 
@@ -271,6 +281,9 @@ async def lambda_main():
             await article_queue.join()
             logger.info("All articles processed")
 
+            # Only now may the next run skip feeds that are not modified
+            await feed_fetcher.save_state()
+
             # Cancel worker tasks
             for task in worker_tasks:
                 task.cancel()
@@ -278,15 +291,29 @@ async def lambda_main():
             # Wait for tasks to be cancelled
             await asyncio.gather(*worker_tasks, return_exceptions=True)
 
+            # Fold this run's articles into the heatmap rollup; a failure
+            # here only delays the rollup until the next run
+            await writer.close()
+            try:
+                await call_db(heatmap.refresh)
+            except Exception as e:
+                logger.error(f"Error refreshing heatmap: {e}")
+
         except Exception as e:
             logger.error(f"Error in ETL process: {e}")
             logger.error(traceback.format_exc())
             raise
         finally:
             logger.info("Cleaning up resources")
+            await writer.close()
             await geocoder.close()
             if hasattr(feed_fetcher, 'session') and feed_fetcher.session:
                 await feed_fetcher.close()
+            # The psycopg2 pool is intentionally left open so that warm
+            # invocations of this container can reuse its connections, but an
+            # asyncpg pool is bound to this invocation's event loop
+            if DB_DRIVER == 'asyncpg':
+                await db.close()
     except Exception as e:
         logger.error(f"Error in lambda_main: {e}")
         logger.error(traceback.format_exc())
@@ -295,22 +322,27 @@ async def lambda_main():
 # Original main function for local execution
 async def main():
     # Import here to ensure environment is set up first when running locally
-    from database import Database
+    from database import create_database, call_db, Database
     from feed_fetcher import FeedFetcher
     from article_processor import ArticleProcessor
     from geocoder import Geocoder
+    from article_writer import ArticleWriter
+    from heatmap import HeatmapAggregator
     from config import POLLING_INTERVAL
 
-    db = Database()
-    db.initialize_db()
+    db = create_database()
+    await call_db(db.initialize_db)
 
     article_queue = asyncio.Queue()
 
     feed_fetcher = FeedFetcher(db)
     article_processor = ArticleProcessor()
     geocoder = Geocoder()
+    writer = ArticleWriter(db)
+    heatmap = HeatmapAggregator(Database())
 
     await geocoder.initialize()
+    await writer.replay_spool()
 
     try:
         feed_task = asyncio.create_task(feed_fetcher.poll_feeds_continuously(article_queue))
@@ -318,20 +350,35 @@ async def main():
         worker_tasks = []
         num_workers = 3
         for _ in range(num_workers):
-            worker_task = asyncio.create_task(article_processor.process_articles(article_queue, geocoder, db))
+            worker_task = asyncio.create_task(article_processor.process_articles(article_queue, geocoder, db, writer))
             worker_tasks.append(worker_task)
+        # Cancelled together with the workers on shutdown
+        worker_tasks.append(asyncio.create_task(refresh_heatmap_periodically(heatmap)))
 
         loop = asyncio.get_running_loop()
         for sig in (signal.SIGINT, signal.SIGTERM):
-            loop.add_signal_handler(sig, lambda: asyncio.create_task(shutdown(feed_task, worker_tasks, geocoder)))
+            loop.add_signal_handler(sig, lambda: asyncio.create_task(shutdown(feed_task, worker_tasks, geocoder, writer)))
 
         await feed_task
     except Exception as e:
         logger.error(f"Error in main process: {e}")
     finally:
+        await writer.close()
         await geocoder.close()
+        await call_db(db.close)
+
+async def refresh_heatmap_periodically(heatmap):
+    from database import call_db
+    from config import HEATMAP_REFRESH_INTERVAL
+
+    while True:
+        await asyncio.sleep(HEATMAP_REFRESH_INTERVAL)
+        try:
+            await call_db(heatmap.refresh)
+        except Exception as e:
+            logger.error(f"Error refreshing heatmap: {e}")
 
-async def shutdown(feed_task, worker_tasks, geocoder):
+async def shutdown(feed_task, worker_tasks, geocoder, writer):
     """Graceful shutdown procedure"""
     logger.info("Shutting down...")
 
@@ -347,6 +394,7 @@ async def shutdown(feed_task, worker_tasks, geocoder):
 
     await asyncio.gather(*worker_tasks, return_exceptions=True)
 
+    await writer.close()
     await geocoder.close()
 
     sys.exit(0)
@@ -169,6 +169,13 @@ resource "aws_ssm_parameter" "max_retries" {
   value       = var.max_retries
 }
 
+resource "aws_ssm_parameter" "lambda_schedule_interval" {
+  name        = "${local.parameter_prefix}/LAMBDA_SCHEDULE_INTERVAL"
+  description = "Seconds between scheduled runs of Mexico News ETL"
+  type        = "String"
+  value       = var.schedule_interval_minutes * 60
+}
+
 resource "aws_ssm_parameter" "retry_delay" {
   name        = "${local.parameter_prefix}/RETRY_DELAY"
   description = "Retry Delay for Mexico News ETL"
@@ -214,17 +221,19 @@ resource "aws_lambda_function" "mexico_news_etl" {
     aws_ssm_parameter.db_user,
     aws_ssm_parameter.db_password,
     aws_ssm_parameter.polling_interval,
+    aws_ssm_parameter.lambda_schedule_interval,
     aws_ssm_parameter.max_retries,
     aws_ssm_parameter.retry_delay,
     aws_ssm_parameter.rss_feeds
   ]
 }
 
-# EventBridge rule for scheduling
+# EventBridge rule for scheduling. Each run only fetches the feeds that are
+# due, so running often keeps adaptive poll intervals close to plan
 resource "aws_cloudwatch_event_rule" "schedule" {
   name                = "mexico-news-etl-schedule"
-  description         = "Trigger Mexico News ETL every 2 hours"
-  schedule_expression = "rate(2 hours)"
+  description         = "Trigger Mexico News ETL every ${var.schedule_interval_minutes} minutes"
+  schedule_expression = "rate(${var.schedule_interval_minutes} minutes)"
 }
 
 # Target for the event rule
@@ -297,6 +306,11 @@ variable "polling_interval" {
   default     = 7200
 }
 
+variable "schedule_interval_minutes" {
+  description = "Minutes between scheduled Lambda runs"
+  default     = 15
+}
+
 variable "max_retries" {
   description = "Maximum Retries"
   default     = 3
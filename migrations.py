@@ -0,0 +1,339 @@
+import logging
+from datetime import date, timedelta
+from psycopg2 import errors, sql
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_SQL = """
+CREATE EXTENSION IF NOT EXISTS postgis;
+
+-- Range partitioned by month on date; unique keys must include the
+-- partition key, hence (id, date) and (url_hash, date)
+CREATE TABLE IF NOT EXISTS news (
+    id SERIAL,
+    news_source TEXT,
+    title TEXT,
+    description TEXT,
+    coordinates GEOGRAPHY(POINT, 4326),
+    type TEXT CHECK (type IN ('crime', 'infrastructure', 'hazard', 'social')),
+    date DATE NOT NULL,
+    url TEXT,
+    url_hash BYTEA GENERATED ALWAYS AS (decode(md5(url), 'hex')) STORED,
+    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, date)
+) PARTITION BY RANGE (date);
+
+-- Catches rows outside every monthly partition
+CREATE TABLE IF NOT EXISTS news_default PARTITION OF news DEFAULT;
+
+CREATE INDEX IF NOT EXISTS news_coordinates_idx ON news USING GIST(coordinates);
+CREATE INDEX IF NOT EXISTS news_type_idx ON news(type);
+CREATE INDEX IF NOT EXISTS news_date_idx ON news(date);
+CREATE INDEX IF NOT EXISTS news_processed_at_idx ON news(processed_at);
+-- One row per URL and date, not per URL: a partitioned table cannot have a
+-- unique index without the partition key. DedupIndex writes changed
+-- articles under their stored date to keep URLs unique in practice
+CREATE UNIQUE INDEX IF NOT EXISTS news_url_hash_idx ON news(url_hash, date);
+
+CREATE UNLOGGED TABLE IF NOT EXISTS news_staging (
+    news_source TEXT,
+    title TEXT,
+    description TEXT,
+    lon DOUBLE PRECISION,
+    lat DOUBLE PRECISION,
+    type TEXT,
+    date DATE,
+    url TEXT
+);
+"""
+
+def stored_columns(cursor, table='news'):
+    """Every stored (non-generated) column of `table`, for moving rows between tables"""
+    cursor.execute("""
+    SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+    FROM pg_attribute
+    WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped AND attgenerated = ''
+    """, (table,))
+    return cursor.fetchone()[0]
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def partition_name(month):
+    return f"news_p{month:%Y_%m}"
+
+
+def _detach_unpartitioned_news(cursor):
+    """
+    First step of converting a plain news table into the partitioned
+    layout: move it and its named objects out of the way so SCHEMA_SQL
+    can create the partitioned table. Returns True if a conversion started.
+    """
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('news')")
+    row = cursor.fetchone()
+    if not row or row[0] != 'r':
+        return False
+
+    logger.info("Converting news into a date partitioned table")
+    cursor.execute("""
+    ALTER TABLE news RENAME TO news_unpartitioned;
+    ALTER TABLE news_unpartitioned RENAME CONSTRAINT news_pkey TO news_unpartitioned_pkey;
+    ALTER SEQUENCE news_id_seq RENAME TO news_unpartitioned_id_seq;
+    DROP INDEX IF EXISTS news_coordinates_idx, news_type_idx, news_date_idx,
+        news_processed_at_idx, news_url_hash_idx;
+    """)
+    return True
+
+
+def _copy_unpartitioned_news(cursor):
+    # Rows without a date get their processing date, since date is now
+    # part of the partition key and cannot be NULL
+    row_date = "COALESCE(date, processed_at::date, CURRENT_DATE)"
+    cursor.execute(f"SELECT DISTINCT date_trunc('month', {row_date})::date FROM news_unpartitioned")
+    for (month,) in cursor.fetchall():
+        create_partition(cursor, month)
+
+    cursor.execute(f"""
+    INSERT INTO news (id, news_source, title, description, coordinates, type, date, url, processed_at)
+    SELECT id, news_source, title, description, coordinates, type, {row_date}, url, processed_at
+    FROM news_unpartitioned
+    """)
+    copied = cursor.rowcount
+    cursor.execute("SELECT setval('news_id_seq', COALESCE((SELECT max(id) FROM news), 1))")
+    cursor.execute("DROP TABLE news_unpartitioned")
+    logger.info(f"Copied {copied} rows into the partitioned news table")
+
+
+def create_partition(cursor, month):
+    name = partition_name(month)
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (name,))
+    if cursor.fetchone()[0]:
+        return False
+
+    start, end = month, next_month(month)
+    cursor.execute(
+        "SELECT EXISTS (SELECT 1 FROM news_default WHERE date >= %s AND date < %s)",
+        (start, end)
+    )
+    default_has_rows = cursor.fetchone()[0]
+
+    # A new partition's range must not overlap rows already sitting in
+    # the default partition, so those are moved over while it is detached
+    if default_has_rows:
+        cursor.execute("ALTER TABLE news DETACH PARTITION news_default")
+    cursor.execute(
+        sql.SQL("CREATE TABLE {} PARTITION OF news FOR VALUES FROM (%s) TO (%s)")
+        .format(sql.Identifier(name)),
+        (start, end)
+    )
+    if default_has_rows:
+        columns = stored_columns(cursor)
+        cursor.execute(f"""
+        WITH moved AS (
+            DELETE FROM news_default WHERE date >= %s AND date < %s
+            RETURNING {columns}
+        )
+        INSERT INTO news ({columns}) SELECT * FROM moved
+        """, (start, end))
+        cursor.execute("ALTER TABLE news ATTACH PARTITION news_default DEFAULT")
+    logger.info(f"Created partition {name}")
+    return True
+
+
+def ensure_partitions(cursor, months_ahead):
+    month = month_start(date.today())
+    for _ in range(months_ahead + 1):
+        create_partition(cursor, month)
+        month = next_month(month)
+
+
+def _initial_schema(cursor):
+    converting = _detach_unpartitioned_news(cursor)
+    cursor.execute(SCHEMA_SQL)
+    if converting:
+        _copy_unpartitioned_news(cursor)
+
+
+HEATMAP_SQL = """
+-- Article counts per web mercator tile cell, zoom level, type and day
+CREATE TABLE IF NOT EXISTS news_heatmap (
+    zoom SMALLINT NOT NULL,
+    date DATE NOT NULL,
+    type TEXT NOT NULL,
+    cell_x INTEGER NOT NULL,
+    cell_y INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (zoom, date, type, cell_x, cell_y)
+);
+
+-- Single row holding the processed_at watermark of the last refresh
+CREATE TABLE IF NOT EXISTS news_heatmap_state (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    refreshed_until TIMESTAMP NOT NULL
+);
+"""
+
+
+DESCRIPTIONS_SQL = """
+-- Side table for article descriptions (DESCRIPTION_STORAGE=side), keyed by
+-- news.id; kept out of the news heap so map queries stay compact
+CREATE TABLE IF NOT EXISTS news_descriptions (
+    news_id INTEGER PRIMARY KEY,
+    description TEXT
+);
+"""
+
+
+# Text search configuration of the search vectors; NewsQueries must parse
+# queries with the same one
+SEARCH_CONFIG = 'spanish'
+
+SEARCH_SQL = f"""
+-- Titles weigh more than descriptions in the ranking. Adding a stored
+-- generated column rewrites every partition once
+ALTER TABLE news ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')
+) STORED;
+CREATE INDEX IF NOT EXISTS news_search_idx ON news USING GIN(search_vector);
+
+ALTER TABLE news_descriptions ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')
+) STORED;
+CREATE INDEX IF NOT EXISTS news_descriptions_search_idx ON news_descriptions USING GIN(search_vector);
+"""
+
+
+CONTENT_HASH_SQL = """
+-- Digests of title and description computed by the ETL (see
+-- database.content_digests); NULL for rows stored before this migration
+ALTER TABLE news ADD COLUMN IF NOT EXISTS content_hash BYTEA;
+ALTER TABLE news ADD COLUMN IF NOT EXISTS semantic_hash BYTEA;
+ALTER TABLE news_staging ADD COLUMN IF NOT EXISTS content_hash BYTEA;
+ALTER TABLE news_staging ADD COLUMN IF NOT EXISTS semantic_hash BYTEA;
+"""
+
+
+FEED_STATE_SQL = """
+-- Per feed fetch state kept across runs: HTTP validators for conditional
+-- GETs and the size and parse cost of the last full download
+CREATE TABLE IF NOT EXISTS feed_state (
+    feed_url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body_bytes INTEGER,
+    parse_seconds DOUBLE PRECISION,
+    checked_at TIMESTAMP,
+    updated_at TIMESTAMP
+);
+"""
+
+
+FEED_SCHEDULE_SQL = """
+-- Adaptive polling state: observed publish rate, the resulting interval
+-- and when the feed is due next
+ALTER TABLE feed_state ADD COLUMN IF NOT EXISTS entries_per_hour DOUBLE PRECISION;
+ALTER TABLE feed_state ADD COLUMN IF NOT EXISTS poll_interval DOUBLE PRECISION;
+ALTER TABLE feed_state ADD COLUMN IF NOT EXISTS next_due_at TIMESTAMP;
+"""
+
+
+FEED_HIGH_WATER_SQL = """
+-- Publication time of the newest entry read from each feed
+ALTER TABLE feed_state ADD COLUMN IF NOT EXISTS high_water_mark TIMESTAMP;
+"""
+
+
+FEED_BREAKER_SQL = """
+-- Circuit breaker: consecutive failed polls and when the feed may be tried again
+ALTER TABLE feed_state ADD COLUMN IF NOT EXISTS failure_count INTEGER;
+ALTER TABLE feed_state ADD COLUMN IF NOT EXISTS open_until TIMESTAMP;
+"""
+
+
+PREVIOUS_COORDINATES_SQL = """
+-- Position an updated article had before, so cached tiles showing it there
+-- are evicted as well
+ALTER TABLE news ADD COLUMN IF NOT EXISTS previous_coordinates GEOGRAPHY(POINT, 4326);
+"""
+
+
+# Ordered (version, description, step) entries. A step is either SQL text or
+# a callable taking a cursor; applied steps must never be edited, add a new
+# entry instead. Version 1 is idempotent so it also adopts databases created
+# before migrations were tracked.
+MIGRATIONS = [
+    (1, "partitioned news table and COPY staging table", _initial_schema),
+    (2, "heatmap rollup tables", HEATMAP_SQL),
+    (3, "news_descriptions side table", DESCRIPTIONS_SQL),
+    (4, "Spanish full-text search vectors", SEARCH_SQL),
+    (5, "content and semantic digests", CONTENT_HASH_SQL),
+    (6, "feed_state table", FEED_STATE_SQL),
+    (7, "adaptive feed polling state", FEED_SCHEDULE_SQL),
+    (8, "feed high-water marks", FEED_HIGH_WATER_SQL),
+    (9, "feed circuit breakers", FEED_BREAKER_SQL),
+    (10, "previous article coordinates", PREVIOUS_COORDINATES_SQL),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Arbitrary constant identifying the migration advisory lock
+MIGRATION_LOCK_ID = 7268053
+
+
+def schema_is_current(cursor, months_ahead):
+    """
+    Fast path run on every start: one query checking the recorded schema
+    version and that the furthest partition needed already exists.
+    """
+    month = month_start(date.today())
+    for _ in range(months_ahead):
+        month = next_month(month)
+    try:
+        cursor.execute(
+            "SELECT (SELECT max(version) FROM schema_migrations), to_regclass(%s) IS NOT NULL",
+            (partition_name(month),)
+        )
+    except errors.UndefinedTable:
+        # Database that has never been migrated
+        logger.info("No schema_migrations table yet, running migrations")
+        cursor.connection.rollback()
+        return False
+    version, has_partitions = cursor.fetchone()
+    return version == SCHEMA_VERSION and has_partitions
+
+
+def migrate(cursor):
+    """Apply pending migrations in order; the caller commits"""
+    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cursor.execute("SELECT COALESCE(max(version), 0) FROM schema_migrations")
+    current = cursor.fetchone()[0]
+    if current > SCHEMA_VERSION:
+        raise RuntimeError(f"Database schema version {current} is newer than this code ({SCHEMA_VERSION})")
+
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        logger.info(f"Applying migration {version}: {description}")
+        if callable(step):
+            step(cursor)
+        else:
+            cursor.execute(step)
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+            (version, description)
+        )
+    return current
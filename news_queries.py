@@ -0,0 +1,220 @@
+import json
+import logging
+from psycopg2.extras import RealDictCursor
+from config import VALID_CATEGORIES
+from migrations import SEARCH_CONFIG
+
+logger = logging.getLogger(__name__)
+
+SELECT_COLUMNS = """
+    n.id, n.news_source, n.title, n.type, n.date, n.url, n.processed_at,
+    ST_X(n.coordinates::geometry) AS lon, ST_Y(n.coordinates::geometry) AS lat
+"""
+
+# Feature built server side so streaming never materializes Python rows
+FEATURE_SQL = """
+    json_build_object(
+        'type', 'Feature',
+        'id', n.id,
+        'geometry', ST_AsGeoJSON(n.coordinates)::json,
+        'properties', json_build_object(
+            'news_source', n.news_source,
+            'title', n.title,
+            'type', n.type,
+            'date', n.date,
+            'url', n.url
+        )
+    )::text
+"""
+
+class NewsQueries:
+    """
+    Read-side queries over news for the map frontend. Every query accepts the
+    same filters:
+
+        bbox        (min_lon, min_lat, max_lon, max_lat), uses news_coordinates_idx
+        near        (lon, lat) together with radius_m in meters
+        types       iterable of categories from VALID_CATEGORIES
+        start_date  inclusive lower bound on date, prunes partitions
+        end_date    inclusive upper bound on date, prunes partitions
+        text        web search syntax over title and description
+                    ("incendio forestal", "bloqueo -manifestación"),
+                    uses the GIN search indexes
+
+    Results are ordered newest first by (date, id) and paginated with a
+    keyset cursor: pass the `next_cursor` of one page as `after` to get the
+    next, which costs the same at any depth, unlike OFFSET.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def _where(self, bbox=None, near=None, radius_m=None, types=None,
+               start_date=None, end_date=None, text=None, after=None):
+        clauses, params = [], []
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            clauses.append("n.coordinates && ST_MakeEnvelope(%s, %s, %s, %s, 4326)::geography")
+            params.extend([min_lon, min_lat, max_lon, max_lat])
+        if near is not None or radius_m is not None:
+            if near is None or radius_m is None:
+                raise ValueError("near and radius_m must be given together")
+            clauses.append("ST_DWithin(n.coordinates, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography, %s)")
+            params.extend([near[0], near[1], radius_m])
+        if types:
+            types = list(types)
+            invalid = [t for t in types if t not in VALID_CATEGORIES]
+            if invalid:
+                raise ValueError(f"Unknown news types: {invalid}")
+            clauses.append("n.type = ANY(%s)")
+            params.append(types)
+        if start_date is not None:
+            clauses.append("n.date >= %s")
+            params.append(start_date)
+        if end_date is not None:
+            clauses.append("n.date <= %s")
+            params.append(end_date)
+        if text:
+            # Descriptions stored in news_descriptions have their own vector
+            clauses.append(f"""(n.search_vector @@ websearch_to_tsquery('{SEARCH_CONFIG}', %s)
+                OR n.id IN (SELECT news_id FROM news_descriptions
+                            WHERE search_vector @@ websearch_to_tsquery('{SEARCH_CONFIG}', %s)))""")
+            params.extend([text, text])
+        if after is not None:
+            clauses.append("(n.date, n.id) < (%s, %s)")
+            params.extend(after)
+        where = "WHERE " + " AND ".join(clauses) if clauses else ""
+        return where, params
+
+    def _select(self, columns, limit=None, with_descriptions=False, **filters):
+        where, params = self._where(**filters)
+        # Descriptions may live in the news_descriptions side table
+        # (DESCRIPTION_STORAGE=side), which is only joined when asked for
+        source = "news n"
+        if with_descriptions:
+            source += " LEFT JOIN news_descriptions d ON d.news_id = n.id"
+        query = f"SELECT {columns} FROM {source} {where} ORDER BY n.date DESC, n.id DESC"
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit)
+        return query, params
+
+    def find(self, limit=100, include_description=False, **filters):
+        """
+        One page of matching articles as dicts with lon/lat. Returns
+        (rows, next_cursor); next_cursor is None on the last page.
+        """
+        columns = SELECT_COLUMNS
+        if include_description:
+            columns += ", COALESCE(n.description, d.description) AS description"
+        query, params = self._select(columns, limit=limit, with_descriptions=include_description, **filters)
+        try:
+            with self.db.connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    cursor.execute(query, params)
+                    rows = cursor.fetchall()
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error querying news: {e}")
+            raise
+        next_cursor = (rows[-1]['date'], rows[-1]['id']) if len(rows) == limit else None
+        return rows, next_cursor
+
+    def search(self, text, limit=50, include_description=False, **filters):
+        """
+        Articles matching `text` combined with the usual filters, best
+        matches first (ts_rank, newest first on ties), as dicts with a
+        `rank` key. Use find(text=...) to page through matches by date.
+        """
+        if filters.get('after') is not None:
+            # `after` is a (date, id) keyset, which does not follow rank order
+            raise ValueError("search() cannot page with after; use find(text=..., after=...)")
+        where, params = self._where(text=text, **filters)
+        columns = SELECT_COLUMNS + f""",
+            ts_rank(n.search_vector || coalesce(d.search_vector, ''::tsvector),
+                    websearch_to_tsquery('{SEARCH_CONFIG}', %s)) AS rank"""
+        if include_description:
+            columns += ", COALESCE(n.description, d.description) AS description"
+        query = f"""
+        SELECT {columns}
+        FROM news n LEFT JOIN news_descriptions d ON d.news_id = n.id
+        {where}
+        ORDER BY rank DESC, n.date DESC, n.id DESC
+        LIMIT %s
+        """
+        try:
+            with self.db.connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    cursor.execute(query, [text] + params + [limit])
+                    rows = cursor.fetchall()
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error searching news for {text!r}: {e}")
+            raise
+        return rows
+
+    def latest(self, n=50, **filters):
+        rows, _ = self.find(limit=n, **filters)
+        return rows
+
+    def stream_geojson(self, chunk_size=1000, **filters):
+        """
+        Yield a GeoJSON FeatureCollection as text chunks. Rows are read
+        through a server-side cursor, so memory does not depend on how many
+        features match.
+        """
+        query, params = self._select(FEATURE_SQL, **filters)
+        with self.db.connection() as conn:
+            with conn.cursor(name='news_geojson') as cursor:
+                cursor.itersize = chunk_size
+                cursor.execute(query, params)
+                yield '{"type": "FeatureCollection", "features": ['
+                separator = ''
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield separator + ','.join(row[0] for row in rows)
+                    separator = ','
+                yield ']}'
+            conn.commit()
+
+    def explain(self, limit=100, **filters):
+        """EXPLAIN (FORMAT JSON) plan of the query find() would run"""
+        query, params = self._select(SELECT_COLUMNS, limit=limit, **filters)
+        with self.db.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("EXPLAIN (FORMAT JSON) " + query, params)
+                plan = cursor.fetchone()[0]
+            conn.commit()
+        return plan if isinstance(plan, list) else json.loads(plan)
+
+    def used_indexes(self, limit=100, **filters):
+        """
+        Names of the news indexes the planner picks for these filters. Scans
+        of per-partition indexes are reported under their parent index name
+        (e.g. news_coordinates_idx), so callers can verify index usage
+        without knowing which partitions exist.
+        """
+        names = set()
+        stack = [node['Plan'] for node in self.explain(limit=limit, **filters)]
+        while stack:
+            node = stack.pop()
+            if 'Index Name' in node:
+                names.add(node['Index Name'])
+            stack.extend(node.get('Plans', []))
+        if not names:
+            return names
+
+        with self.db.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                SELECT child.relname, parent.relname
+                FROM pg_inherits
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                WHERE child.relkind = 'i' AND child.relname = ANY(%s)
+                """, (list(names),))
+                parents = dict(cursor.fetchall())
+            conn.commit()
+        return {parents.get(name, name) for name in names}
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from config import (
+    MAX_RETRIES, RETRY_BASE_DELAY, RETRY_MAX_DELAY, BREAKER_FAILURE_THRESHOLD,
+    BREAKER_COOLDOWN, BREAKER_MAX_COOLDOWN
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter: the wait before retry n is drawn
+    from [0, base_delay * 2**(n-1)], capped at max_delay. A server's
+    Retry-After is honoured as the minimum wait; one asking for more than
+    max_delay ends the retries instead of blocking the run. There is always
+    at least one attempt, even with MAX_RETRIES=0.
+    """
+
+    def __init__(self, attempts=MAX_RETRIES, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY):
+        self.attempts = max(attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @staticmethod
+    def retry_after(headers):
+        """Seconds requested by a Retry-After header (delay or HTTP date), or None"""
+        value = headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        now = datetime.now(when.tzinfo) if when.tzinfo else datetime.utcnow()
+        return max((when - now).total_seconds(), 0.0)
+
+    def delay(self, attempt, retry_after=None):
+        """Wait before retrying after failed `attempt` (1-based), or None to give up"""
+        if attempt >= self.attempts:
+            return None
+        if retry_after is not None and retry_after > self.max_delay:
+            return None
+        delay = random.uniform(0, min(self.base_delay * 2 ** (attempt - 1), self.max_delay))
+        return max(delay, retry_after or 0.0)
+
+    async def wait(self, attempt, retry_after=None):
+        """Sleep before the next attempt; False when there should be none"""
+        delay = self.delay(attempt, retry_after)
+        if delay is None:
+            return False
+        await asyncio.sleep(delay)
+        return True
+
+
+class CircuitBreaker:
+    """
+    Per-feed circuit breaker kept in the feed's feed_state dict, so it
+    survives across runs. After `threshold` consecutive failed polls the
+    breaker opens and the feed is skipped until `open_until`; the next poll
+    after that is a trial, and each further failure doubles the cool-down
+    up to `max_cooldown`. Any successful poll closes it.
+    """
+
+    def __init__(self, threshold=BREAKER_FAILURE_THRESHOLD, cooldown=BREAKER_COOLDOWN,
+                 max_cooldown=BREAKER_MAX_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+
+    def allow(self, state, now=None):
+        open_until = state.get('open_until')
+        return open_until is None or (now or datetime.utcnow()) >= open_until
+
+    def record_success(self, state):
+        state['failure_count'] = 0
+        state['open_until'] = None
+
+    def record_failure(self, state, now=None):
+        failures = (state.get('failure_count') or 0) + 1
+        state['failure_count'] = failures
+        if failures >= self.threshold:
+            cooldown = min(self.cooldown * 2 ** (failures - self.threshold), self.max_cooldown)
+            state['open_until'] = (now or datetime.utcnow()) + timedelta(seconds=cooldown)
+            return True
+        return False
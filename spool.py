@@ -0,0 +1,66 @@
+import json
+import logging
+import sqlite3
+import threading
+from datetime import date
+from config import SPOOL_PATH
+
+logger = logging.getLogger(__name__)
+
+class ArticleSpool:
+    """
+    Durable local queue (SQLite) for articles that were fully classified and
+    geocoded but could not be stored, so the Bedrock and Mapbox work is
+    never redone. Articles are replayed in order once the database accepts
+    writes again. In Lambda /tmp survives for the lifetime of a warm
+    container, so the spool drains on a later invocation of the same one.
+    """
+
+    def __init__(self, path=SPOOL_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        # Accessed from executor threads, serialized by self.lock
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS spooled_articles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            article TEXT NOT NULL,
+            spooled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT count(*) FROM spooled_articles").fetchone()[0]
+
+    def append(self, articles):
+        rows = [(json.dumps(article, default=str),) for article in articles]
+        with self.lock:
+            with self.conn:
+                self.conn.execute("BEGIN")
+                self.conn.executemany("INSERT INTO spooled_articles (article) VALUES (?)", rows)
+        logger.warning(f"Spooled {len(rows)} articles to {self.path}")
+
+    def peek(self, limit):
+        """Oldest spooled articles as (spool id, article) pairs"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, article FROM spooled_articles ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        entries = []
+        for spool_id, payload in rows:
+            article = json.loads(payload)
+            article['date'] = date.fromisoformat(article['date'])
+            entries.append((spool_id, article))
+        return entries
+
+    def remove(self, spool_ids):
+        with self.lock:
+            with self.conn:
+                self.conn.execute("BEGIN")
+                self.conn.executemany("DELETE FROM spooled_articles WHERE id = ?", [(i,) for i in spool_ids])
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
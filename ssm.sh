@@ -95,6 +95,7 @@ PARAMS=(
     "MAPBOX_ACCESS_TOKEN:Your Mapbox access token:SecureString"
     "CLAUDE_MODEL_ID:us.anthropic.claude-3-5-haiku-20241022-v1:0"
     "POLLING_INTERVAL:7200"
+    "LAMBDA_SCHEDULE_INTERVAL:900"
     "MAX_RETRIES:3"
     "RETRY_DELAY:10"
     "RSS_FEEDS:https://www.mural.com.mx/rss/portada.xml,https://www.elnorte.com/rss/portada.xml,https://www.jornada.com.mx/rss/estados.xml?v=1"
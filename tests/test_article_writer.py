@@ -0,0 +1,107 @@
+"""
+ArticleWriter's spooling against a stand-in insert_articles and a
+temporary SQLite ArticleSpool: failed and over-limit batches are spooled,
+the spool drains after the next successful write, and articles survive the
+JSON round trip.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from article_writer import ArticleWriter, SPOOLED  # noqa: E402
+from spool import ArticleSpool  # noqa: E402
+
+
+def article(n):
+    return {
+        'news_source': 'Prueba', 'title': f'Nota {n}', 'description': f'Texto {n}',
+        'lon': -99.13, 'lat': 19.43, 'type': 'crime', 'date': date(2026, 1, n),
+        'url': f'https://example.com/{n}',
+    }
+
+
+class FakeDatabase:
+    """insert_articles storing into a list; fails while `failing`, waits while `gate` is unset"""
+
+    def __init__(self):
+        self.stored = []
+        self.failing = False
+        self.gate = None
+
+    async def insert_articles(self, articles):
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.failing:
+            raise RuntimeError("database unavailable")
+        first = len(self.stored) + 1
+        self.stored.extend(articles)
+        return list(range(first, first + len(articles)))
+
+
+class ArticleWriterSpoolTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.spool = ArticleSpool(os.path.join(self.tmp.name, 'spool.db'))
+        self.db = FakeDatabase()
+
+    def tearDown(self):
+        self.spool.close()
+        self.tmp.cleanup()
+
+    def writer(self, **kwargs):
+        return ArticleWriter(self.db, spool=self.spool, max_latency=60, **kwargs)
+
+    async def test_failed_batch_is_spooled(self):
+        writer = self.writer(batch_size=2)
+        self.db.failing = True
+        futures = [writer.submit(article(1)), writer.submit(article(2))]
+        self.assertEqual(await asyncio.gather(*futures), [SPOOLED, SPOOLED])
+        self.assertEqual(len(self.spool), 2)
+        self.assertEqual(self.db.stored, [])
+
+    async def test_spool_replays_after_next_successful_write(self):
+        writer = self.writer(batch_size=1)
+        self.db.failing = True
+        self.assertEqual(await writer.write(article(1)), SPOOLED)
+        self.db.failing = False
+        self.assertEqual(await writer.write(article(2)), 1)
+        await writer.close()
+        self.assertEqual(len(self.spool), 0)
+        self.assertEqual([stored['url'] for stored in self.db.stored], [article(2)['url'], article(1)['url']])
+
+    async def test_in_flight_limit_spools(self):
+        writer = self.writer(batch_size=1, max_in_flight=1)
+        self.db.gate = asyncio.Event()
+        first = writer.submit(article(1))
+        await asyncio.sleep(0)
+        self.assertEqual(await writer.submit(article(2)), SPOOLED)
+        self.db.gate.set()
+        self.assertEqual(await first, 1)
+        await writer.close()
+        self.assertEqual(len(self.spool), 0)
+        self.assertEqual(len(self.db.stored), 2)
+
+    async def test_failed_replay_keeps_the_spool(self):
+        writer = self.writer(batch_size=1)
+        self.spool.append([article(1)])
+        self.db.failing = True
+        self.assertEqual(await writer.replay_spool(), 0)
+        self.assertEqual(len(self.spool), 1)
+
+    def test_dates_round_trip(self):
+        self.spool.append([article(1), article(2)])
+        entries = self.spool.peek(10)
+        self.assertEqual([spooled for _, spooled in entries], [article(1), article(2)])
+        self.assertIsInstance(entries[0][1]['date'], date)
+        self.spool.remove([entries[0][0]])
+        self.assertEqual([spooled for _, spooled in self.spool.peek(10)], [article(2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
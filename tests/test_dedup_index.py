@@ -0,0 +1,112 @@
+"""
+DedupIndex.filter_new against an in-memory stand-in for the database: new,
+unchanged, cosmetically and substantially edited articles, the stored date
+a known URL is written under, and rows stored without digests.
+"""
+import os
+import sys
+import unittest
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import content_digests, url_digest  # noqa: E402
+from dedup_index import DedupIndex  # noqa: E402
+
+STORED_DATE = date(2026, 1, 3)
+
+
+def article(url='https://example.com/a', title='Choque en Reforma',
+            description='Dos autos chocaron en Reforma.', day=date(2026, 1, 5)):
+    return {'url': url, 'title': title, 'description': description, 'date': day}
+
+
+class FakeDatabase:
+    """The two lookups DedupIndex makes, over {url_hash: (content, semantic, date)}"""
+
+    def __init__(self, rows=None, fail=False):
+        self.rows = rows or {}
+        self.fail = fail
+        self.lookups = []
+
+    async def get_processed_url_hashes(self, window_days):
+        return dict(self.rows)
+
+    async def get_existing_url_hashes(self, hashes):
+        self.lookups.append(list(hashes))
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        return {digest: self.rows[digest] for digest in hashes if digest in self.rows}
+
+
+def stored(original, digests=None):
+    """FakeDatabase row for `original` stored under STORED_DATE"""
+    return {url_digest(original['url']): (*(digests or content_digests(original)), STORED_DATE)}
+
+
+class FilterNewTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_new_article(self):
+        index = DedupIndex(FakeDatabase(), mode='batch')
+        fresh = article()
+        self.assertEqual(await index.filter_new([fresh]), [fresh])
+        self.assertNotIn('change', fresh)
+        self.assertIn(fresh['url'], index)
+
+    async def test_unchanged_article_is_skipped(self):
+        index = DedupIndex(FakeDatabase(), mode='batch')
+        await index.filter_new([article()])
+        self.assertEqual(await index.filter_new([article()]), [])
+
+    async def test_duplicate_urls_in_one_cycle(self):
+        index = DedupIndex(FakeDatabase(), mode='batch')
+        self.assertEqual(len(await index.filter_new([article(), article(title='Otro título')])), 1)
+
+    async def test_cosmetic_edit(self):
+        db = FakeDatabase(stored(article()))
+        index = DedupIndex(db, mode='batch')
+        edited = article(title='<b>Choque</b> en   reforma')
+        self.assertEqual(await index.filter_new([edited]), [edited])
+        self.assertEqual(edited['change'], 'cosmetic')
+        self.assertEqual(edited['date'], STORED_DATE)
+
+    async def test_content_edit(self):
+        index = DedupIndex(FakeDatabase(stored(article())), mode='batch')
+        edited = article(description='Tres autos chocaron en Reforma.')
+        self.assertEqual(await index.filter_new([edited]), [edited])
+        self.assertEqual(edited['change'], 'content')
+        self.assertEqual(edited['date'], STORED_DATE)
+
+    async def test_preloaded_urls_skip_the_lookup(self):
+        db = FakeDatabase(stored(article()))
+        index = DedupIndex(db, mode='window')
+        await index.load()
+        edited = article(description='Tres autos chocaron en Reforma.')
+        await index.filter_new([edited])
+        self.assertEqual(db.lookups, [[]])
+        self.assertEqual((edited['change'], edited['date']), ('content', STORED_DATE))
+
+    async def test_edit_seen_by_this_process_keeps_first_date(self):
+        index = DedupIndex(FakeDatabase(), mode='batch')
+        await index.filter_new([article(day=date(2026, 1, 4))])
+        edited = article(description='Tres autos chocaron en Reforma.')
+        await index.filter_new([edited])
+        self.assertEqual(edited['date'], date(2026, 1, 4))
+
+    async def test_row_without_digests_is_cosmetic(self):
+        index = DedupIndex(FakeDatabase(stored(article(), digests=(None, None))), mode='batch')
+        edited = article(description='Tres autos chocaron en Reforma.')
+        self.assertEqual(await index.filter_new([edited]), [edited])
+        self.assertEqual(edited['change'], 'cosmetic')
+        self.assertEqual(edited['date'], STORED_DATE)
+
+    async def test_failed_lookup_treats_urls_as_new(self):
+        index = DedupIndex(FakeDatabase(stored(article()), fail=True), mode='batch')
+        known = article()
+        self.assertEqual(await index.filter_new([known]), [known])
+        self.assertNotIn('change', known)
+        self.assertEqual(known['date'], date(2026, 1, 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Checks that feed_reader's incremental (iterparse) path reads entries the
+same way as feedparser, and that it stops early at the high-water mark and
+after a run of known URLs. No database or network needed.
+"""
+import os
+import sys
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feed_reader import read_feed  # noqa: E402
+
+RSS = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">
+<channel>
+<title>Noticias de prueba</title>
+<item>
+  <title>Escaped &lt;b&gt;markup&lt;/b&gt; &amp; entities</title>
+  <link>https://example.com/escaped</link>
+  <description>&lt;p&gt;Lluvias en &lt;a href="https://example.com/x"&gt;Puebla&lt;/a&gt;&lt;/p&gt;</description>
+  <pubDate>Mon, 05 Jan 2026 10:00:00 -0600</pubDate>
+</item>
+<item>
+  <title>CDATA body</title>
+  <link>https://example.com/cdata</link>
+  <description><![CDATA[<p>Choque en <em>Reforma</em></p>]]></description>
+  <pubDate>Mon, 05 Jan 2026 09:00:00 GMT</pubDate>
+</item>
+<item>
+  <title>Unsafe markup</title>
+  <link>https://example.com/unsafe</link>
+  <description><![CDATA[<p onclick="x()">Texto</p><script>alert(1)</script><iframe src="https://evil"></iframe>]]></description>
+  <pubDate>Mon, 05 Jan 2026 08:00:00 GMT</pubDate>
+</item>
+<item>
+  <title>Guid only</title>
+  <guid>https://example.com/guid-only</guid>
+  <content:encoded><![CDATA[<div>Contenido <b>completo</b></div>]]></content:encoded>
+  <pubDate>Mon, 05 Jan 2026 07:00:00 GMT</pubDate>
+</item>
+</channel>
+</rss>
+"""
+
+ATOM = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+<title>Atom de prueba</title>
+<entry>
+  <title type="html">Sismo &lt;i&gt;leve&lt;/i&gt;</title>
+  <link rel="alternate" href="https://example.com/atom-1"/>
+  <link rel="self" href="https://example.com/atom-1.xml"/>
+  <summary type="html">&lt;p&gt;Sin da&amp;ntilde;os&lt;/p&gt;&lt;script&gt;x()&lt;/script&gt;</summary>
+  <published>2026-01-05T10:00:00Z</published>
+</entry>
+<entry>
+  <title>Plain &amp; text</title>
+  <link href="https://example.com/atom-2"/>
+  <summary type="text">Texto &lt;b&gt; literal</summary>
+  <updated>2026-01-04T10:00:00-06:00</updated>
+</entry>
+</feed>
+"""
+
+
+def rss_items(count):
+    """An RSS feed of `count` items, newest first, one hour apart"""
+    items = ''.join(
+        f"<item><title>Nota {i}</title><link>https://example.com/{i}</link>"
+        f"<description>Texto {i}</description>"
+        f"<pubDate>Mon, 05 Jan 2026 {23 - i:02d}:00:00 GMT</pubDate></item>"
+        for i in range(count)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>T</title>{items}</channel></rss>'.encode()
+
+
+class ReadFeedParityTest(unittest.TestCase):
+
+    def assertSameAsFeedparser(self, raw):
+        title, articles, newest, _ = read_feed(raw, incremental=True)
+        expected_title, expected, expected_newest, _ = read_feed(raw, incremental=False)
+        self.assertEqual(title, expected_title)
+        self.assertEqual(articles, expected)
+        self.assertEqual(newest, expected_newest)
+        return articles
+
+    def test_rss(self):
+        articles = self.assertSameAsFeedparser(RSS)
+        self.assertEqual(len(articles), 4)
+        self.assertNotIn('<script', articles[2][2])
+        self.assertEqual(articles[3][0], 'https://example.com/guid-only')
+
+    def test_atom(self):
+        articles = self.assertSameAsFeedparser(ATOM)
+        self.assertEqual([url for url, *_ in articles], ['https://example.com/atom-1', 'https://example.com/atom-2'])
+
+    def test_malformed_xml_falls_back_to_feedparser(self):
+        self.assertSameAsFeedparser(RSS.replace(b'</channel>', b''))
+
+
+class ReadFeedEarlyStopTest(unittest.TestCase):
+
+    def test_stops_at_high_water_mark(self):
+        _, articles, newest, _ = read_feed(rss_items(10), high_water_mark=datetime(2026, 1, 5, 20))
+        self.assertEqual([url for url, *_ in articles], [f"https://example.com/{i}" for i in range(4)])
+        self.assertEqual(newest, datetime(2026, 1, 5, 23))
+
+    def test_stops_after_known_run(self):
+        known = {f"https://example.com/{i}" for i in range(2, 10)}
+        _, articles, _, _ = read_feed(rss_items(10), known_urls=known, known_run=3)
+        self.assertEqual(len(articles), 5)
+
+    def test_full_parse_ignores_early_stops(self):
+        known = {f"https://example.com/{i}" for i in range(10)}
+        _, articles, _, _ = read_feed(
+            rss_items(10), high_water_mark=datetime(2026, 1, 5, 20), known_urls=known,
+            incremental=False, known_run=1
+        )
+        self.assertEqual(len(articles), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
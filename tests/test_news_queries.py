@@ -0,0 +1,80 @@
+"""
+EXPLAIN-backed checks that NewsQueries filters are served by the news
+indexes. They need a scratch PostGIS database, named by TEST_DB_NAME (the
+other DB_* settings apply as usual), and are skipped without one:
+
+    TEST_DB_NAME=news_test python -m unittest discover tests
+
+The schema is migrated, a tagged sample of articles spread over Mexico and
+the last two years is inserted and analyzed so the planner sees realistic
+statistics, and the sample is deleted again afterwards.
+"""
+import os
+import sys
+import unittest
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psycopg2  # noqa: E402
+from config import DB_CONFIG  # noqa: E402
+from database import Database  # noqa: E402
+from news_queries import NewsQueries  # noqa: E402
+
+TEST_DB_NAME = os.getenv('TEST_DB_NAME')
+SAMPLE_SOURCE = 'news_queries explain test'
+SAMPLE_ROWS = 50000
+
+# A few blocks of Mexico City, a tiny share of the sample
+CITY_BBOX = (-99.20, 19.38, -99.16, 19.42)
+
+
+@unittest.skipUnless(TEST_DB_NAME, "TEST_DB_NAME is not set")
+class NewsQueriesIndexTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        DB_CONFIG['database'] = TEST_DB_NAME
+        cls.db = Database(pooled=False)
+        try:
+            cls.db.initialize_db()
+        except psycopg2.OperationalError as e:
+            raise unittest.SkipTest(f"Test database unavailable: {e}")
+        with cls.db.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                INSERT INTO news (news_source, title, description, coordinates, type, date, url)
+                SELECT %s, 'Nota ' || i, 'Descripción ' || i,
+                    ST_SetSRID(ST_MakePoint(-117 + random() * 31, 14 + random() * 18), 4326),
+                    (ARRAY['crime', 'infrastructure', 'hazard', 'social'])[1 + i %% 4],
+                    CURRENT_DATE - (random() * 730)::int,
+                    'https://example.com/explain-test/' || i
+                FROM generate_series(1, %s) AS i
+                """, (SAMPLE_SOURCE, SAMPLE_ROWS))
+                cursor.execute("ANALYZE news")
+            conn.commit()
+        cls.queries = NewsQueries(cls.db)
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.db.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM news WHERE news_source = %s", (SAMPLE_SOURCE,))
+                cursor.execute("ANALYZE news")
+            conn.commit()
+
+    def test_bbox_uses_coordinates_index(self):
+        self.assertIn('news_coordinates_idx', self.queries.used_indexes(bbox=CITY_BBOX))
+
+    def test_bbox_with_type_uses_coordinates_index(self):
+        indexes = self.queries.used_indexes(bbox=CITY_BBOX, types=['crime'])
+        self.assertIn('news_coordinates_idx', indexes)
+
+    def test_date_range_uses_date_index(self):
+        end = date.today() - timedelta(days=10)
+        indexes = self.queries.used_indexes(start_date=end - timedelta(days=3), end_date=end)
+        self.assertIn('news_date_idx', indexes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,337 @@
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from aiohttp import web
+from database import Database, call_db
+from heatmap import REFRESH_OVERLAP, lonlat_to_tile
+from config import (
+    VALID_CATEGORIES, TILE_CACHE_SIZE, TILE_CACHE_DIR, TILE_CACHE_DISK_BYTES, TILE_MAX_ZOOM,
+    TILE_MAX_FEATURES, TILE_INVALIDATION_INTERVAL, TILE_SERVER_PORT
+)
+
+logger = logging.getLogger(__name__)
+
+MVT_CONTENT_TYPE = 'application/vnd.mapbox-vector-tile'
+# File in the disk cache holding the invalidation watermark its tiles are
+# current up to
+WATERMARK_FILE = 'checked_until'
+
+class TileCache:
+    """
+    LRU cache of encoded tiles, optionally backed by a directory laid out as
+    z/x/y/<filter digest>.mvt so it survives restarts. Entries are grouped by
+    tile, so invalidating a tile drops it for every filter combination. The
+    directory is an LRU of its own, trimmed to `max_bytes`, since every
+    distinct filter (date ranges included) adds files to it.
+    """
+
+    def __init__(self, max_entries=TILE_CACHE_SIZE, directory=TILE_CACHE_DIR,
+                 max_bytes=TILE_CACHE_DISK_BYTES):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        # Disk files in LRU order: path -> ((z, x, y), size)
+        self.files = OrderedDict()
+        self.disk_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if directory:
+            self._scan()
+
+    def _scan(self):
+        """Index the tiles left on disk by a previous process, least recently written first"""
+        found = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith('.mvt'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    z, x, y = (int(part) for part in os.path.relpath(root, self.directory).split(os.sep))
+                    stat = os.stat(path)
+                except (ValueError, OSError):
+                    continue
+                found.append((stat.st_mtime, path, (z, x, y), stat.st_size))
+        for _, path, tile, size in sorted(found):
+            self.files[path] = (tile, size)
+            self.disk_bytes += size
+        self._trim_disk()
+
+    def _trim_disk(self):
+        with self.lock:
+            evicted = []
+            while self.disk_bytes > self.max_bytes and self.files:
+                path, (_, size) = self.files.popitem(last=False)
+                self.disk_bytes -= size
+                evicted.append(path)
+        for path in evicted:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def load_watermark(self):
+        """processed_at up to which the disk tiles are known to be current, or None"""
+        try:
+            with open(os.path.join(self.directory, WATERMARK_FILE)) as f:
+                return datetime.fromisoformat(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def save_watermark(self, checked_until):
+        path = os.path.join(self.directory, WATERMARK_FILE)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(checked_until.isoformat())
+        os.replace(tmp_path, path)
+
+    def clear_disk(self):
+        """Remove every tile from the disk cache"""
+        with self.lock:
+            self.files.clear()
+            self.disk_bytes = 0
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _path(self, key):
+        (z, x, y), filters = key
+        digest = hashlib.md5(repr(filters).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, str(z), str(x), str(y), f"{digest}.mvt")
+
+    def get(self, key):
+        with self.lock:
+            tile = self.entries.get(key)
+            if tile is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return tile
+        if self.directory:
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    tile = f.read()
+                with self.lock:
+                    if path in self.files:
+                        self.files.move_to_end(path)
+                    self.hits += 1
+                self._remember(key, tile)
+                return tile
+            except FileNotFoundError:
+                pass
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, tile):
+        self._remember(key, tile)
+        if self.directory:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so readers never see a partial tile
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(tile)
+            os.replace(tmp_path, path)
+            with self.lock:
+                _, previous_size = self.files.pop(path, (None, 0))
+                self.files[path] = (key[0], len(tile))
+                self.disk_bytes += len(tile) - previous_size
+            self._trim_disk()
+
+    def _remember(self, key, tile):
+        with self.lock:
+            self.entries[key] = tile
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, tiles):
+        """Drop every cached entry for the given (z, x, y) tiles"""
+        tiles = set(tiles)
+        with self.lock:
+            stale = [key for key in self.entries if key[0] in tiles]
+            for key in stale:
+                del self.entries[key]
+        if self.directory:
+            with self.lock:
+                removed = [path for path, (tile, _) in self.files.items() if tile in tiles]
+                for path in removed:
+                    self.disk_bytes -= self.files.pop(path)[1]
+            for z, x, y in tiles:
+                shutil.rmtree(os.path.join(self.directory, str(z), str(x), str(y)), ignore_errors=True)
+        return len(stale)
+
+
+class TileServer:
+    """
+    Mapbox Vector Tiles for the news layer, generated with ST_AsMVT from
+    news.coordinates and filterable by type and date range. Tiles touched by
+    newly inserted articles are evicted from the cache: the ETL usually runs
+    in another process, so the server polls for rows processed since its
+    last check (at most every TILE_INVALIDATION_INTERVAL seconds). The
+    disk cache stores that watermark next to its tiles; a disk cache
+    without one (older or interrupted) is cleared at startup, since its
+    tiles may predate any number of changes.
+    """
+
+    def __init__(self, db, cache=None, max_zoom=TILE_MAX_ZOOM, max_features=TILE_MAX_FEATURES):
+        self.db = db
+        self.cache = cache or TileCache()
+        self.max_zoom = max_zoom
+        self.max_features = max_features
+        self.checked_until = None
+        self.last_check = 0
+        # Tiles are served from executor threads; one of them checks for
+        # new articles at a time and the others wait for its evictions
+        self.invalidation_lock = threading.RLock()
+        if self.cache.directory:
+            self.checked_until = self.cache.load_watermark()
+            if self.checked_until is None:
+                logger.info("Disk tile cache has no invalidation watermark, clearing it")
+                self.cache.clear_disk()
+
+    def get_tile(self, z, x, y, types=None, start_date=None, end_date=None):
+        if not 0 <= z <= self.max_zoom or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            raise ValueError(f"Invalid tile {z}/{x}/{y}")
+        types = tuple(sorted(types)) if types else None
+        if types and any(t not in VALID_CATEGORIES for t in types):
+            raise ValueError(f"Unknown news types: {types}")
+
+        if time.monotonic() - self.last_check >= TILE_INVALIDATION_INTERVAL:
+            with self.invalidation_lock:
+                # Another thread may have checked while this one waited
+                if time.monotonic() - self.last_check >= TILE_INVALIDATION_INTERVAL:
+                    self.invalidate_new_articles()
+
+        key = ((z, x, y), (types, start_date, end_date))
+        tile = self.cache.get(key)
+        if tile is None:
+            tile = self._render(z, x, y, types, start_date, end_date)
+            self.cache.put(key, tile)
+        return tile
+
+    def _render(self, z, x, y, types, start_date, end_date):
+        clauses, params = [], [z, x, y]
+        if types:
+            clauses.append("AND n.type = ANY(%s)")
+            params.append(list(types))
+        if start_date is not None:
+            clauses.append("AND n.date >= %s")
+            params.append(start_date)
+        if end_date is not None:
+            clauses.append("AND n.date <= %s")
+            params.append(end_date)
+        params.append(self.max_features)
+
+        try:
+            with self.db.connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"""
+                    WITH bounds AS (
+                        SELECT ST_TileEnvelope(%s, %s, %s) AS geom
+                    ),
+                    features AS (
+                        SELECT
+                            ST_AsMVTGeom(ST_Transform(n.coordinates::geometry, 3857), bounds.geom) AS geom,
+                            n.id, n.title, n.type, n.date::text AS date, n.url
+                        FROM news n, bounds
+                        WHERE n.coordinates && ST_Transform(bounds.geom, 4326)::geography
+                        {" ".join(clauses)}
+                        ORDER BY n.date DESC, n.id DESC
+                        LIMIT %s
+                    )
+                    SELECT ST_AsMVT(features, 'news', 4096, 'geom') FROM features
+                    """, params)
+                    tile = cursor.fetchone()[0]
+                conn.commit()
+            return bytes(tile) if tile is not None else b''
+        except Exception as e:
+            logger.error(f"Error rendering tile {z}/{x}/{y}: {e}")
+            raise
+
+    def invalidate_points(self, points):
+        """Evict the tiles at every zoom level containing the given (lon, lat) points"""
+        tiles = {
+            (z,) + lonlat_to_tile(lon, lat, z)
+            for lon, lat in points
+            for z in range(self.max_zoom + 1)
+        }
+        return self.cache.invalidate(tiles)
+
+    def invalidate_new_articles(self):
+        """
+        Evict tiles containing articles processed since the previous check,
+        at their current and (for updated rows) previous position
+        """
+        with self.invalidation_lock:
+            self.last_check = time.monotonic()
+            try:
+                with self.db.connection() as conn:
+                    with conn.cursor() as cursor:
+                        cursor.execute("SELECT LOCALTIMESTAMP")
+                        now = cursor.fetchone()[0]
+                        points = []
+                        if self.checked_until is not None:
+                            cursor.execute("""
+                            SELECT ST_X(point::geometry), ST_Y(point::geometry)
+                            FROM news, LATERAL (VALUES (coordinates), (previous_coordinates)) AS p(point)
+                            WHERE processed_at > %s AND point IS NOT NULL
+                            """, (self.checked_until - REFRESH_OVERLAP,))
+                            points = cursor.fetchall()
+                    conn.commit()
+            except Exception as e:
+                logger.error(f"Error checking for new articles: {e}")
+                return 0
+
+            evicted = self.invalidate_points(points) if points else 0
+            self.checked_until = now
+            if self.cache.directory:
+                self.cache.save_watermark(now)
+            if evicted:
+                logger.info(f"Evicted {evicted} cached tiles affected by {len(points)} new articles")
+            return evicted
+
+
+def _parse_date(value):
+    return date.fromisoformat(value) if value else None
+
+
+def create_app(tile_server):
+    async def handle_tile(request):
+        try:
+            z, x = int(request.match_info['z']), int(request.match_info['x'])
+            y = int(request.match_info['y'])
+            types = request.query.get('types')
+            tile = await call_db(
+                tile_server.get_tile, z, x, y,
+                types=types.split(',') if types else None,
+                start_date=_parse_date(request.query.get('start')),
+                end_date=_parse_date(request.query.get('end'))
+            )
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=str(e))
+        return web.Response(body=tile, content_type=MVT_CONTENT_TYPE)
+
+    app = web.Application()
+    app.router.add_get('/tiles/{z}/{x}/{y}.mvt', handle_tile)
+    return app
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    web.run_app(create_app(TileServer(Database())), port=TILE_SERVER_PORT)